@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Cache persistant des analyses de vidéos
+Évite de réanalyser les vidéos inchangées d'une exécution à l'autre
+"""
+
+import os
+import json
+import hashlib
+import logging
+
+logger = logging.getLogger(__name__)
+
+class AnalysisCache:
+    def __init__(self, cache_file="analysis_cache.json", hash_content=False):
+        """Initialise le cache à partir du fichier (créé au premier save)
+
+        Une entrée est valide si la taille, la date de modification et les
+        paramètres du détecteur sont identiques. Avec hash_content, une vidéo
+        dont seule la date a changé (copie, touch) est validée par son
+        empreinte SHA-256.
+        """
+        self.cache_file = cache_file
+        self.hash_content = hash_content
+        self.entries = self.load()
+        self.dirty = False
+
+    def load(self):
+        """Charge les entrées du cache"""
+        try:
+            with open(self.cache_file, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+        except (json.JSONDecodeError, OSError) as e:
+            logger.warning(f"Cache {self.cache_file} illisible, ignoré: {e}")
+            return {}
+
+    def save(self):
+        """Écrit le cache de façon atomique (fichier temporaire + rename)"""
+        if not self.dirty:
+            return
+        tmp_file = f"{self.cache_file}.tmp"
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            json.dump(self.entries, f, ensure_ascii=False)
+        os.replace(tmp_file, self.cache_file)
+        self.dirty = False
+
+    @staticmethod
+    def content_hash(video_path, chunk_size=1024 * 1024):
+        """Calcule l'empreinte SHA-256 du contenu de la vidéo"""
+        digest = hashlib.sha256()
+        with open(video_path, 'rb') as f:
+            for chunk in iter(lambda: f.read(chunk_size), b''):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+    @staticmethod
+    def detector_key(params):
+        """Sérialise les paramètres d'analyse en une clé stable"""
+        return json.dumps(params, sort_keys=True)
+
+    def get(self, video_path, params):
+        """Retourne le résultat en cache si la vidéo est inchangée, sinon None
+
+        Une vidéo devenue illisible (supprimée, déplacée pendant l'exécution)
+        est un défaut de cache : l'analyse signalera l'erreur pour elle seule.
+        """
+        key = os.path.abspath(video_path)
+        entry = self.entries.get(key)
+        if entry is None or entry['detector_key'] != self.detector_key(params):
+            return None
+
+        try:
+            stat = os.stat(video_path)
+            if entry['size'] != stat.st_size:
+                return None
+            if entry['mtime_ns'] != stat.st_mtime_ns:
+                if not (self.hash_content and entry.get('content_hash')):
+                    return None
+                if self.content_hash(video_path) != entry['content_hash']:
+                    return None
+                # Contenu identique : mettre à jour la date pour éviter de rehasher
+                entry['mtime_ns'] = stat.st_mtime_ns
+                self.dirty = True
+        except OSError as e:
+            logger.warning(f"Vidéo inaccessible, cache ignoré: {video_path} ({e})")
+            return None
+
+        return entry['result']
+
+    def put(self, video_path, params, result):
+        """Enregistre le résultat d'analyse d'une vidéo
+
+        Rien n'est enregistré si la vidéo a disparu entre-temps.
+        """
+        try:
+            stat = os.stat(video_path)
+            content_hash = self.content_hash(video_path) if self.hash_content else None
+        except OSError as e:
+            logger.warning(f"Vidéo inaccessible, résultat non mis en cache: {video_path} ({e})")
+            return
+        self.entries[os.path.abspath(video_path)] = {
+            'size': stat.st_size,
+            'mtime_ns': stat.st_mtime_ns,
+            'content_hash': content_hash,
+            'detector_key': self.detector_key(params),
+            'result': result
+        }
+        self.dirty = True
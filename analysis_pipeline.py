@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+"""
+Pipeline producteur/consommateur décodage -> détection
+Des threads de décodage préchargent les frames des vidéos suivantes dans une
+file bornée pendant que les threads de détection consomment les lots ; OpenCV
+libère le GIL, décodage et détection se recouvrent dans un seul processus
+"""
+
+import queue
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+# Marqueur de fin de flux pour les threads de détection
+_END = object()
+
+class AnalysisPipeline:
+    def __init__(self, analyzer, decode_threads=2, detect_threads=1, queue_depth=4):
+        """Pipeline autour d'un VideoAnalyzer
+
+        queue_depth : nombre de lots de frames décodés en attente de
+        détection. La mémoire des frames est bornée à (queue_depth +
+        decode_threads + detect_threads) lots de batch_size frames.
+        """
+        self.analyzer = analyzer
+        self.decode_threads = max(1, decode_threads)
+        self.detect_threads = max(1, detect_threads)
+        self.queue_depth = max(1, queue_depth)
+
+    def iter_analyses(self, video_files):
+        """Analyse les vidéos et produit (fichier, résultat, erreur) dans l'ordre de video_files
+
+        video_files peut être un générateur (parcours d'arborescence) : les
+        threads de décodage en tirent la vidéo suivante à tour de rôle.
+        """
+        video_files = iter(video_files)
+        feed_lock = threading.Lock()
+        fed = 0
+        frame_batches = queue.Queue(maxsize=self.queue_depth)
+        outcomes = queue.Queue()
+        stop = threading.Event()
+
+        def put(item):
+            """Dépose un élément dans la file bornée sans bloquer un arrêt"""
+            while not stop.is_set():
+                try:
+                    frame_batches.put(item, timeout=0.1)
+                    return True
+                except queue.Full:
+                    continue
+            return False
+
+        def complete(job):
+            """Termine un job dont tous les lots ont été détectés"""
+            job.session.close()
+            if job.error is None:
+                try:
+                    outcomes.put((job.index, job.video_path, self.analyzer.finish_video(job), None))
+                    return
+                except Exception as e:
+                    job.error = str(e)
+            outcomes.put((job.index, job.video_path, None, job.error))
+
+        def next_video():
+            """(index, fichier) suivant ; None en fin de liste (nombre total signalé)"""
+            nonlocal fed
+            with feed_lock:
+                if fed is None:
+                    return None
+                try:
+                    video_file = next(video_files)
+                except StopIteration:
+                    outcomes.put((_END, fed))
+                    fed = None
+                    return None
+                except Exception as e:
+                    logger.error(f"Parcours des vidéos interrompu: {e}")
+                    outcomes.put((_END, fed))
+                    fed = None
+                    return None
+                fed += 1
+                return fed - 1, video_file
+
+        def decode():
+            while not stop.is_set():
+                item = next_video()
+                if item is None:
+                    return
+                index, video_file = item
+                try:
+                    job = self.analyzer.start_video(video_file)
+                except Exception as e:
+                    outcomes.put((index, video_file, None, str(e)))
+                    continue
+                job.index = index
+                try:
+                    for batch in self.analyzer.iter_job_batches(job):
+                        with job.lock:
+                            job.pending += 1
+                        if not put((job, batch)):
+                            job.session.close()
+                            return
+                except Exception as e:
+                    job.error = str(e)
+                with job.lock:
+                    job.decoded = True
+                    finished = job.pending == 0
+                if finished:
+                    complete(job)
+
+        def detect():
+            while True:
+                item = frame_batches.get()
+                if item is _END:
+                    return
+                job, batch = item
+                if not stop.is_set() and job.error is None:
+                    try:
+                        self.analyzer.detect_job_batch(job, batch)
+                    except Exception as e:
+                        job.error = str(e)
+                with job.lock:
+                    job.pending -= 1
+                    finished = job.decoded and job.pending == 0
+                if finished:
+                    complete(job)
+
+        decoders = [threading.Thread(target=decode, name=f"decode-{i}", daemon=True)
+                    for i in range(self.decode_threads)]
+        detectors = [threading.Thread(target=detect, name=f"detect-{i}", daemon=True)
+                     for i in range(self.detect_threads)]
+
+        def close_detectors():
+            for thread in decoders:
+                thread.join()
+            for _ in detectors:
+                frame_batches.put(_END)
+
+        logger.info(f"Pipeline : {self.decode_threads} threads de décodage, {self.detect_threads} de détection, "
+                    f"file de {self.queue_depth} lots")
+        for thread in decoders + detectors:
+            thread.start()
+        threading.Thread(target=close_detectors, name="pipeline-close", daemon=True).start()
+
+        # Remettre les résultats dans l'ordre des fichiers
+        ready = {}
+        next_index = 0
+        total = None
+        try:
+            while total is None or next_index < total:
+                outcome = outcomes.get()
+                if outcome[0] is _END:
+                    total = outcome[1]
+                    continue
+                index, video_file, result, error = outcome
+                ready[index] = (video_file, result, error)
+                while next_index in ready:
+                    yield ready.pop(next_index)
+                    next_index += 1
+        finally:
+            stop.set()
@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Banc d'essai des détecteurs
+Mesure le temps (réel et CPU) par frame et la mémoire de pointe de chaque détecteur
+"""
+
+import sys
+import time
+import argparse
+import tracemalloc
+import importlib
+import importlib.util
+import numpy as np
+import cv2
+
+def load_module(path, name):
+    """Charge un module détecteur depuis un fichier (par ex. une ancienne version)"""
+    spec = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+def load_frames(video_path, count, size):
+    """Charge des frames d'une vidéo, ou génère des frames synthétiques texturées"""
+    if video_path:
+        from video_session import VideoSession
+        with VideoSession(video_path) as session:
+            return session.sample_frames(count)
+
+    width, height = size
+    rng = np.random.default_rng(0)
+    frames = []
+    for i in range(count):
+        frame = rng.integers(0, 255, (height, width, 3), dtype=np.uint8)
+        frames.append(cv2.GaussianBlur(frame, (0, 0), 2 + i % 5))
+    return frames
+
+def measure(func, frames, repeat, batched=False):
+    """Retourne (ms par frame, ms CPU par frame, mémoire de pointe en Mo) pour func
+
+    Le temps CPU (tous threads du processus) permet de comparer des
+    détecteurs multi-threads à coût égal.
+    """
+    # Échauffement : alloue les tampons persistants hors mesure
+    func(frames) if batched else [func(frame) for frame in frames]
+
+    tracemalloc.start()
+    start = time.perf_counter()
+    cpu_start = time.process_time()
+    for _ in range(repeat):
+        if batched:
+            func(frames)
+        else:
+            for frame in frames:
+                func(frame)
+    elapsed = time.perf_counter() - start
+    cpu = time.process_time() - cpu_start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    count = repeat * len(frames)
+    return elapsed * 1000 / count, cpu * 1000 / count, peak / (1024 * 1024)
+
+def benchmark(module, frames, repeat, onnx_options=None):
+    """Mesure toutes les méthodes disponibles d'un module détecteur"""
+    fast = module.FastMLXDetector()
+    accurate = module.MLXAnimalDetector()
+    timings = {}
+
+    timings['quick_detect'] = measure(fast.quick_detect, frames, repeat)
+    if hasattr(fast, 'quick_detect_batch'):
+        timings['quick_detect_batch'] = measure(fast.quick_detect_batch, frames, repeat, batched=True)
+    timings['detect_objects'] = measure(accurate.detect_objects, frames, repeat)
+    if onnx_options:
+        onnx = module.create_detector("onnx", **onnx_options)
+        timings['onnx.detect_batch'] = measure(onnx.detect_batch, frames, repeat, batched=True)
+
+    return timings
+
+def main():
+    """Fonction principale"""
+    parser = argparse.ArgumentParser(description="Banc d'essai des détecteurs")
+    parser.add_argument("video_path", nargs="?", help="Vidéo dont extraire les frames (sinon frames synthétiques)")
+    parser.add_argument("--frames", "-n", type=int, default=10, help="Nombre de frames")
+    parser.add_argument("--size", default="1920x1080", help="Taille des frames synthétiques (LxH)")
+    parser.add_argument("--repeat", "-r", type=int, default=5, help="Nombre de répétitions")
+    parser.add_argument("--baseline", help="Fichier mlx_detector.py de référence à comparer")
+    parser.add_argument("--onnx-model", help="Mesurer aussi le détecteur onnx avec ce modèle")
+    parser.add_argument("--threads", type=int, help="Threads d'inférence du détecteur onnx")
+
+    args = parser.parse_args()
+
+    size = tuple(int(v) for v in args.size.lower().split('x'))
+    frames = load_frames(args.video_path, args.frames, size)
+    if not frames:
+        print("❌ Aucune frame à mesurer")
+        sys.exit(1)
+
+    height, width = frames[0].shape[:2]
+    print(f"🧪 {len(frames)} frames {width}x{height}, {args.repeat} répétitions")
+
+    onnx_options = None
+    if args.onnx_model:
+        onnx_options = {'model_path': args.onnx_model, 'intra_op_threads': args.threads}
+    current = benchmark(importlib.import_module("mlx_detector"), frames, args.repeat, onnx_options)
+    baseline = None
+    if args.baseline:
+        baseline = benchmark(load_module(args.baseline, "mlx_detector_baseline"), frames, args.repeat)
+
+    print(f"{'Méthode':<22}{'ms/frame':>10}{'CPU ms':>9}{'pic Mo':>8}{'réf. ms':>10}{'réf. Mo':>9}{'gain':>8}")
+    for name, (ms, cpu_ms, peak) in current.items():
+        line = f"{name:<22}{ms:>10.2f}{cpu_ms:>9.2f}{peak:>8.1f}"
+        if baseline and (name in baseline or name == 'quick_detect_batch'):
+            # Sans version par lot dans la référence, comparer au chemin par frame
+            base_ms, _, base_peak = baseline.get(name) or baseline['quick_detect']
+            line += f"{base_ms:>10.2f}{base_peak:>9.1f}{base_ms / ms:>7.2f}x"
+        print(line)
+
+if __name__ == "__main__":
+    main()
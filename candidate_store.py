@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+Stockage des candidats de détection indépendant du seuil
+Conserve tous les candidats notés d'une analyse dans un tableau compact
+(.npz) pour régénérer les résultats à n'importe quel seuil sans relire les vidéos
+"""
+
+import os
+import json
+import math
+import logging
+from event_tracker import track_detections, event_max_gap
+
+logger = logging.getLogger(__name__)
+
+# Mesures de forme des détecteurs heuristiques (absentes des détections ONNX)
+SHAPE_FIELDS = ('contour_area', 'extent')
+
+def to_candidates(detections):
+    """Détections -> lignes compactes
+    [frame_time, x1, y1, x2, y2, confidence, contour_area, extent, class_id, classe]
+
+    Format de transport des candidats dans un résultat (JSON, entre
+    processus et dans le cache d'analyse). contour_area et extent sont les
+    mesures sur lesquelles filtrent les détecteurs heuristiques (aire du
+    contour à leur résolution de travail, aire / aire du rectangle) ; None
+    pour un détecteur qui ne les fournit pas.
+    """
+    return [[d['frame_time'], *d['bbox'], d['confidence'], d.get('contour_area'), d.get('extent'),
+             d.get('class_id', 0), d['class']]
+            for d in detections]
+
+def strip_shape_fields(detections):
+    """Retire des détections les mesures de forme réservées au stockage des candidats"""
+    for detection in detections:
+        for field in SHAPE_FIELDS:
+            detection.pop(field, None)
+    return detections
+
+class CandidateStore:
+    def __init__(self, store_file="candidates.npz"):
+        """Candidats et métadonnées des vidéos d'une analyse
+
+        Les candidats de toutes les vidéos forment un seul tableau structuré
+        (vidéo, temps, boîte, aire, allongement, confiance, aire du contour,
+        étendue, classe) ; les
+        résultats sans leurs détections sont conservés à côté.
+        """
+        self.store_file = store_file
+        self.results = []
+        self.rows = []
+
+    def collect(self, result):
+        """Retire les candidats d'un résultat et les ajoute au stockage
+
+        Retourne une copie du résultat sans candidats (le résultat d'origine,
+        éventuellement partagé avec le cache d'analyse, n'est pas modifié).
+        """
+        result = dict(result)
+        candidates = result.pop('candidates', None)
+        if candidates is None:
+            return result
+        video_index = len(self.results)
+        self.results.append({k: v for k, v in result.items()
+                             if k not in ('detections', 'events', 'event_count', 'detection_format')})
+        self.rows.extend([video_index, *candidate] for candidate in candidates)
+        return result
+
+    def save(self):
+        """Écrit le tableau des candidats et les métadonnées (.npz compressé)"""
+        import numpy as np
+
+        classes = sorted({row[-1] for row in self.rows})
+        class_index = {name: i for i, name in enumerate(classes)}
+        table = np.zeros(len(self.rows), dtype=[
+            ('video', 'i4'), ('frame_time', 'f8'), ('x1', 'i4'), ('y1', 'i4'), ('x2', 'i4'), ('y2', 'i4'),
+            ('area', 'i4'), ('aspect_ratio', 'f4'), ('confidence', 'f8'),
+            ('contour_area', 'f4'), ('extent', 'f4'), ('class_id', 'i4'), ('class', 'i2')])
+        for i, (video, frame_time, x1, y1, x2, y2, confidence, contour_area, extent,
+                class_id, name) in enumerate(self.rows):
+            width, height = x2 - x1, y2 - y1
+            # Mesure absente (détecteur ONNX) : NaN, jamais écartée par un filtre de forme
+            table[i] = (video, frame_time, x1, y1, x2, y2, width * height,
+                        width / height if height else 0.0, confidence,
+                        math.nan if contour_area is None else contour_area,
+                        math.nan if extent is None else extent, class_id, class_index[name])
+
+        # Fichier temporaire puis renommage (exports concurrents de la file partagée)
+        tmp_file = f"{self.store_file}.{os.getpid()}.tmp.npz"
+        np.savez_compressed(tmp_file, candidates=table, classes=np.array(classes),
+                            results=np.array(json.dumps(self.results, ensure_ascii=False)))
+        os.replace(tmp_file, self.store_file)
+        logger.info(f"{len(self.rows)} candidats de {len(self.results)} vidéos sauvegardés dans {self.store_file}")
+
+    @staticmethod
+    def load(store_file):
+        """Relit un stockage : (tableau des candidats, classes, résultats sans détections)"""
+        import numpy as np
+
+        with np.load(store_file) as data:
+            return data['candidates'], list(data['classes']), json.loads(str(data['results']))
+
+    @staticmethod
+    def results_at(store_file, confidence_threshold=0.5, detection_format="raw",
+                   min_contour_area=None, min_extent=None):
+        """Régénère les résultats d'analyse au seuil donné, sans décodage vidéo
+
+        Même règle que les détecteurs : un candidat est retenu si sa
+        confiance dépasse strictement le seuil. min_contour_area et
+        min_extent resserrent les filtres de forme des détecteurs
+        heuristiques (les candidats sans mesure sont conservés).
+        """
+        import numpy as np
+
+        table, classes, results = CandidateStore.load(store_file)
+        keep = table['confidence'] > confidence_threshold
+        if min_contour_area is not None:
+            keep &= ~(table['contour_area'] < min_contour_area)
+        if min_extent is not None:
+            keep &= ~(table['extent'] < min_extent)
+        kept = table[np.asarray(keep)]
+
+        per_video = [[] for _ in results]
+        for row in kept:
+            per_video[row['video']].append({
+                'class': str(classes[row['class']]),
+                'confidence': float(row['confidence']),
+                'bbox': [int(row['x1']), int(row['y1']), int(row['x2']), int(row['y2'])],
+                'class_id': int(row['class_id']),
+                'frame_time': float(row['frame_time'])
+            })
+
+        for result, detections in zip(results, per_video):
+            if detection_format != "raw":
+                max_gap = event_max_gap(result['duration'], result['sampled_frames'])
+                events = track_detections(detections, max_gap=max_gap)
+                if detection_format == "events":
+                    detections = events
+                    result['detection_format'] = "events"
+                else:
+                    result['events'] = events
+                    result['event_count'] = len(events)
+            result['detections'] = detections
+            result['detection_count'] = len(detections)
+            result['confidence_threshold'] = confidence_threshold
+        return results
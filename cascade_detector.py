@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+Cascade de détecteurs rapide puis précis
+Le détecteur rapide trie toutes les frames ; seules les frames (ou zones) où il
+trouve un candidat sont confirmées par le détecteur précis, en pleine résolution
+"""
+
+import logging
+from detectors import create_detector, run_detector
+
+logger = logging.getLogger(__name__)
+
+class CascadeDetector:
+    def __init__(self, screen="fast", confirm="accurate", screen_threshold=0.3, regions=False,
+                 region_padding=0.25, screen_options=None, confirm_options=None):
+        """Assemble un détecteur de tri et un détecteur de confirmation
+
+        screen_threshold : confiance minimale d'un candidat du détecteur de
+        tri pour envoyer la frame en confirmation.
+        regions : ne confirmer que le rectangle englobant les candidats
+        (agrandi de region_padding de chaque côté) plutôt que la frame
+        entière.
+        """
+        self.screen = create_detector(screen, **(screen_options or {}))
+        self.confirm = create_detector(confirm, **(confirm_options or {}))
+        self.screen_threshold = screen_threshold
+        self.regions = regions
+        self.region_padding = region_padding
+        logger.info(f"Cascade {screen} -> {confirm} (seuil de tri {screen_threshold}, "
+                    f"{'zones' if regions else 'frames entières'})")
+
+    def candidate_region(self, candidates, image):
+        """Rectangle englobant les candidats, agrandi et borné à l'image"""
+        height, width = image.shape[:2]
+        x1 = min(c['bbox'][0] for c in candidates)
+        y1 = min(c['bbox'][1] for c in candidates)
+        x2 = max(c['bbox'][2] for c in candidates)
+        y2 = max(c['bbox'][3] for c in candidates)
+        pad_x = max(32, int((x2 - x1) * self.region_padding))
+        pad_y = max(32, int((y2 - y1) * self.region_padding))
+        return (max(0, x1 - pad_x), max(0, y1 - pad_y),
+                min(width, x2 + pad_x), min(height, y2 + pad_y))
+
+    def detect_batch(self, images, confidence_threshold=0.5):
+        """Détecte les objets dans un lot : tri rapide puis confirmation"""
+        candidates = run_detector(self.screen, images, self.screen_threshold)
+
+        selected = [i for i, frame_candidates in enumerate(candidates) if frame_candidates]
+        all_detections = [[] for _ in images]
+        if not selected:
+            return all_detections
+
+        regions = {}
+        if self.regions:
+            regions = {i: self.candidate_region(candidates[i], images[i]) for i in selected}
+            to_confirm = [images[i][y1:y2, x1:x2] for i, (x1, y1, x2, y2) in regions.items()]
+        else:
+            to_confirm = [images[i] for i in selected]
+
+        logger.debug(f"Cascade : {len(selected)}/{len(images)} frames confirmées")
+        confirmed = run_detector(self.confirm, to_confirm, confidence_threshold)
+        for i, detections in zip(selected, confirmed):
+            if i in regions:
+                x1, y1, _, _ = regions[i]
+                for detection in detections:
+                    bx1, by1, bx2, by2 = detection['bbox']
+                    detection['bbox'] = [bx1 + x1, by1 + y1, bx2 + x1, by2 + y1]
+            all_detections[i] = detections
+        return all_detections
+
+    def quick_detect(self, image, confidence_threshold=0.5):
+        """Détection sur une seule image (même interface que FastMLXDetector)"""
+        return self.detect_batch([image], confidence_threshold)[0]
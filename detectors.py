@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+"""
+Registre des détecteurs
+Associe un nom de détecteur à sa fabrique ; les modules lourds (OpenCV, MLX,
+ONNX Runtime) ne sont importés qu'à la création d'un détecteur de ce type
+"""
+
+def _create_fast_detector(**options):
+    """Détecteur rapide heuristique (Sobel + contours)"""
+    from mlx_detector import FastMLXDetector
+    return FastMLXDetector(**options)
+
+def _create_accurate_detector(**options):
+    """Détecteur précis heuristique (Canny + contours)"""
+    from mlx_detector import MLXAnimalDetector
+    return MLXAnimalDetector(**options)
+
+def _create_onnx_detector(**options):
+    """Détecteur neuronal CPU via ONNX Runtime"""
+    from onnx_detector import OnnxDetector
+    return OnnxDetector(**options)
+
+def _create_cascade_detector(**options):
+    """Cascade : tri par le détecteur rapide, confirmation par un détecteur précis"""
+    from cascade_detector import CascadeDetector
+    return CascadeDetector(**options)
+
+# Registre des détecteurs : nom -> fabrique acceptant les options du détecteur
+DETECTOR_REGISTRY = {
+    'fast': _create_fast_detector,
+    'accurate': _create_accurate_detector,
+    'onnx': _create_onnx_detector,
+    'cascade': _create_cascade_detector
+}
+
+def register_detector(name, factory):
+    """Ajoute un détecteur au registre (factory(**options) -> détecteur)"""
+    DETECTOR_REGISTRY[name] = factory
+
+def create_detector(detector_type="fast", **options):
+    """Factory pour créer le bon détecteur"""
+    if detector_type not in DETECTOR_REGISTRY:
+        raise ValueError(f"Détecteur inconnu: {detector_type} (disponibles: {', '.join(DETECTOR_REGISTRY)})")
+    return DETECTOR_REGISTRY[detector_type](**options)
+
+def run_detector(detector, frames, confidence_threshold=0.5):
+    """Lance un détecteur sur une liste de frames, une liste de détections par frame
+
+    Utilise la méthode par lot du détecteur si elle existe.
+    """
+    if hasattr(detector, 'quick_detect_batch'):
+        return detector.quick_detect_batch(frames, confidence_threshold=confidence_threshold)
+    if hasattr(detector, 'detect_batch'):
+        return detector.detect_batch(frames, confidence_threshold=confidence_threshold)
+    return [detector.quick_detect(frame, confidence_threshold=confidence_threshold) for frame in frames]
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Regroupement temporel des détections en événements
+Relie les détections de frames successives par IoU et classe : un animal qui
+traverse le champ donne un seul événement au lieu d'une détection par frame
+"""
+
+def bbox_iou(box_a, box_b):
+    """Intersection sur union de deux boîtes [x1, y1, x2, y2]"""
+    inter_w = min(box_a[2], box_b[2]) - max(box_a[0], box_b[0])
+    inter_h = min(box_a[3], box_b[3]) - max(box_a[1], box_b[1])
+    if inter_w <= 0 or inter_h <= 0:
+        return 0.0
+    intersection = inter_w * inter_h
+    area_a = (box_a[2] - box_a[0]) * (box_a[3] - box_a[1])
+    area_b = (box_b[2] - box_b[0]) * (box_b[3] - box_b[1])
+    return intersection / float(area_a + area_b - intersection)
+
+def event_max_gap(duration, sampled_frames, min_gap=2.0):
+    """Écart maximal (s) entre deux détections d'un même événement
+
+    Au moins min_gap, et 1,5 fois l'intervalle moyen entre frames
+    échantillonnées : un animal peut rester entre deux frames espacées.
+    """
+    frame_interval = duration / sampled_frames if sampled_frames else 0.0
+    return max(min_gap, 1.5 * frame_interval)
+
+def track_detections(detections, iou_threshold=0.3, max_gap=2.0):
+    """Regroupe des détections par frame en événements
+
+    detections : détections avec 'frame_time', triées par temps (ordre de
+    analyze_video). Une détection prolonge l'événement actif de même classe
+    dont la dernière boîte la recouvre le plus (IoU >= iou_threshold), si
+    celui-ci a été vu il y a au plus max_gap secondes ; sinon elle ouvre un
+    nouvel événement.
+
+    Chaque événement garde les clés d'une détection ('class', 'confidence',
+    'bbox', 'frame_time') pour rester lisible par le rapport et l'interface
+    web : confidence est le pic de confiance, bbox la boîte de ce pic et
+    frame_time le début de l'événement.
+    """
+    events = []
+    active = []
+
+    for detection in sorted(detections, key=lambda d: d['frame_time']):
+        frame_time = detection['frame_time']
+        active = [event for event in active if frame_time - event['end_time'] <= max_gap]
+
+        best_event, best_iou = None, iou_threshold
+        for event in active:
+            if event['class'] != detection['class'] or event['end_time'] == frame_time:
+                continue
+            iou = bbox_iou(event['last_bbox'], detection['bbox'])
+            if iou >= best_iou:
+                best_event, best_iou = event, iou
+
+        if best_event is None:
+            best_event = {
+                'class': detection['class'],
+                'class_id': detection.get('class_id', 0),
+                'confidence': detection['confidence'],
+                'bbox': detection['bbox'],
+                'frame_time': frame_time,
+                'start_time': frame_time,
+                'end_time': frame_time,
+                'peak_time': frame_time,
+                'detection_count': 0,
+                'last_bbox': detection['bbox']
+            }
+            events.append(best_event)
+            active.append(best_event)
+
+        best_event['end_time'] = frame_time
+        best_event['last_bbox'] = detection['bbox']
+        best_event['detection_count'] += 1
+        if detection['confidence'] > best_event['confidence']:
+            best_event['confidence'] = detection['confidence']
+            best_event['bbox'] = detection['bbox']
+            best_event['peak_time'] = frame_time
+
+    for event in events:
+        del event['last_bbox']
+    return events
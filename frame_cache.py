@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+Cache disque des frames décodées
+Conserve les frames échantillonnées de chaque vidéo en piles uint8 .npy,
+relues par projection mémoire : changer de seuil ou de détecteur ne redécode
+pas les vidéos
+"""
+
+import os
+import json
+import hashlib
+import logging
+
+logger = logging.getLogger(__name__)
+
+class CachedFrames:
+    def __init__(self, info, frames, probes=None):
+        """Frames d'une vidéo relues depuis le cache, à la place d'une VideoSession
+
+        Expose les attributs de VideoSession utilisés par l'analyse
+        (metadata, taille des frames, decode_scale, motion_peak).
+        """
+        self.info = info
+        self.frame_width = info['frame_width']
+        self.frame_height = info['frame_height']
+        self.decode_scale = info['decode_scale']
+        self.motion_peak = info.get('motion_peak')
+        self.timed_frames = list(zip(info['frame_times'], frames))
+        self.probes = probes
+
+    def metadata(self):
+        """Métadonnées de la vidéo d'origine"""
+        return self.info['metadata']
+
+    def sample_frames(self, max_frames=10, strategy="auto"):
+        """Sondes du préfiltre : frames uniformes en cache"""
+        if self.probes is not None:
+            return list(self.probes)
+        return [frame for _, frame in self.timed_frames]
+
+    def close(self):
+        """Rien à libérer (les projections mémoire suivent les tableaux)"""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+class FrameCache:
+    def __init__(self, cache_dir="frame_cache"):
+        """Cache de frames dans cache_dir (créé au besoin)
+
+        Une entrée par vidéo et par paramètres d'échantillonnage : une pile
+        (N, H, W, 3) uint8 <clé>.npy, éventuellement les sondes du préfiltre
+        <clé>.probes.npy, et <clé>.json (identité du fichier, horodatage des
+        frames, métadonnées). Le .json est écrit en dernier : sa présence
+        valide l'entrée. Une vidéo modifiée (taille ou date) remplace son
+        entrée.
+        """
+        self.cache_dir = cache_dir
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def _base(self, video_path, params):
+        """Chemin de base des fichiers d'une entrée (vidéo + paramètres)"""
+        key = json.dumps({'path': os.path.abspath(video_path), 'params': params}, sort_keys=True)
+        return os.path.join(self.cache_dir, hashlib.sha256(key.encode('utf-8')).hexdigest()[:24])
+
+    @staticmethod
+    def _identity(video_path):
+        stat = os.stat(video_path)
+        return {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+
+    def load(self, video_path, params, need_probes=False):
+        """CachedFrames de la vidéo si l'entrée est valide, sinon None"""
+        import numpy as np
+
+        base = self._base(video_path, params)
+        try:
+            with open(f"{base}.json", 'r', encoding='utf-8') as f:
+                info = json.load(f)
+        except FileNotFoundError:
+            return None
+        except (json.JSONDecodeError, OSError) as e:
+            logger.warning(f"Entrée du cache de frames illisible, ignorée: {e}")
+            return None
+
+        if info['identity'] != self._identity(video_path) or (need_probes and not info['has_probes']):
+            return None
+        try:
+            frames = np.load(f"{base}.npy", mmap_mode='r')
+            probes = np.load(f"{base}.probes.npy", mmap_mode='r') if info['has_probes'] else None
+        except (OSError, ValueError) as e:
+            logger.warning(f"Frames en cache illisibles pour {video_path}: {e}")
+            return None
+        return CachedFrames(info, frames, probes)
+
+    def _save_stack(self, filename, frames, frame_shape):
+        """Écrit une pile de frames (éventuellement vide) de façon atomique"""
+        import numpy as np
+
+        stack = np.stack(frames) if frames else np.empty((0,) + frame_shape, dtype=np.uint8)
+        tmp_file = f"{filename}.tmp.npy"
+        np.save(tmp_file, stack)
+        os.replace(tmp_file, filename)
+
+    def save(self, video_path, params, session, timed_frames, probes=None):
+        """Enregistre les frames échantillonnées d'une vidéo
+
+        session fournit métadonnées et taille des frames ; timed_frames est
+        la liste des (temps, frame) analysés, probes les sondes du préfiltre
+        quand elles diffèrent de ces frames.
+        """
+        base = self._base(video_path, params)
+        frame_shape = (session.frame_height, session.frame_width, 3)
+        self._save_stack(f"{base}.npy", [frame for _, frame in timed_frames], frame_shape)
+        if probes:
+            self._save_stack(f"{base}.probes.npy", probes, frame_shape)
+
+        info = {
+            'identity': self._identity(video_path),
+            'video_path': os.path.abspath(video_path),
+            'metadata': session.metadata(),
+            'frame_width': session.frame_width,
+            'frame_height': session.frame_height,
+            'decode_scale': session.decode_scale,
+            'motion_peak': getattr(session, 'motion_peak', None),
+            'frame_times': [frame_time for frame_time, _ in timed_frames],
+            'has_probes': bool(probes)
+        }
+        tmp_file = f"{base}.json.tmp"
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            json.dump(info, f, ensure_ascii=False)
+        os.replace(tmp_file, f"{base}.json")
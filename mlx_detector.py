@@ -4,19 +4,51 @@ Détecteur d'objets optimisé pour MLX sur MacBook M4
 Utilise des modèles légers et rapides pour la détection d'animaux
 """
 
-import mlx.core as mx
-import mlx.nn as nn
 import numpy as np
 import cv2
-from PIL import Image
 import logging
+import threading
+from detectors import DETECTOR_REGISTRY, create_detector
 
 logger = logging.getLogger(__name__)
 
+def load_mlx():
+    """Importe mlx.core à la demande ; None si MLX n'est pas installé (hors Apple Silicon)"""
+    try:
+        import mlx.core as mx
+    except ImportError:
+        return None
+    return mx
+
+def default_device():
+    """Périphérique MLX par défaut, ou "cpu" sans MLX"""
+    mx = load_mlx()
+    return mx.default_device() if mx is not None else "cpu"
+
+class ScratchBuffers:
+    """Tampons de travail réutilisés d'un appel à l'autre (un jeu par thread)
+
+    Un tampon est réalloué seulement si la forme demandée change ; pour les
+    piles (N, H, W), un tampon plus long est réutilisé en tranche [:N].
+    """
+    
+    def __init__(self):
+        self._local = threading.local()
+    
+    def get(self, name, shape, dtype):
+        """Retourne le tampon name de forme shape, alloué au besoin"""
+        buffers = self._local.__dict__
+        buffer = buffers.get(name)
+        if (buffer is None or buffer.dtype != dtype or buffer.ndim != len(shape)
+                or buffer.shape[1:] != tuple(shape[1:]) or buffer.shape[0] < shape[0]):
+            buffer = np.empty(shape, dtype=dtype)
+            buffers[name] = buffer
+        return buffer[:shape[0]]
+
 class MLXAnimalDetector:
     def __init__(self):
         """Initialise le détecteur avec un modèle optimisé pour MLX"""
-        self.device = mx.default_device()
+        self.device = default_device()
         logger.info(f"Initialisation du détecteur MLX sur {self.device}")
         
         # Classes d'animaux pertinentes pour la forêt du Jura
@@ -42,37 +74,39 @@ class MLXAnimalDetector:
         self.input_size = (640, 640)
         self.num_classes = len(self.wildlife_classes)
         
+        # Tampons de travail réutilisés entre appels (par taille d'image)
+        self.scratch = ScratchBuffers()
+        
         logger.info("Modèle MLX initialisé avec succès")
     
     def preprocess_image(self, image):
-        """Préprocesse une image pour le modèle MLX"""
-        if isinstance(image, np.ndarray):
-            image = Image.fromarray(cv2.cvtColor(image, cv2.COLOR_BGR2RGB))
-        
-        # Redimensionner l'image pour optimiser les performances
-        image = image.resize(self.input_size)
-        
-        # Convertir en array numpy puis MLX
-        image_array = np.array(image, dtype=np.float32) / 255.0
-        image_array = np.transpose(image_array, (2, 0, 1))  # HWC -> CHW
-        image_array = np.expand_dims(image_array, axis=0)  # Ajouter dimension batch
-        
-        # Convertir vers MLX
-        pixel_values = mx.array(image_array)
+        """Préprocesse une image pour le modèle MLX : tenseur (1, 3, H, W) normalisé
+
+        Redimensionnement OpenCV puis BGR -> RGB, HWC -> CHW et normalisation
+        en une opération vectorisée, sans passer par PIL.
+        """
+        if not isinstance(image, np.ndarray):
+            image = cv2.cvtColor(np.array(image.convert('RGB')), cv2.COLOR_RGB2BGR)
+        resized = cv2.resize(image, self.input_size)
+        pixel_values = np.multiply(resized[None, ..., ::-1].transpose(0, 3, 1, 2), np.float32(1 / 255.0),
+                                   dtype=np.float32)
         
-        return pixel_values
+        # Convertir vers MLX si disponible
+        mx = load_mlx()
+        return mx.array(pixel_values) if mx is not None else pixel_values
     
     def detect_objects(self, image, confidence_threshold=0.5):
         """Détecte les objets dans une image en utilisant des techniques de vision par ordinateur"""
         try:
             # Convertir l'image en niveaux de gris pour l'analyse
-            if isinstance(image, np.ndarray):
-                gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
-            else:
-                gray = cv2.cvtColor(np.array(image), cv2.COLOR_RGB2GRAY)
+            if not isinstance(image, np.ndarray):
+                image = cv2.cvtColor(np.array(image), cv2.COLOR_RGB2BGR)
+            gray = self.scratch.get('gray', image.shape[:2], np.uint8)
+            cv2.cvtColor(image, cv2.COLOR_BGR2GRAY, dst=gray)
             
             # Détection de contours pour identifier les objets
-            edges = cv2.Canny(gray, 50, 150)
+            edges = self.scratch.get('edges', image.shape[:2], np.uint8)
+            cv2.Canny(gray, 50, 150, edges=edges)
             contours, _ = cv2.findContours(edges, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
             
             detections = []
@@ -111,7 +145,10 @@ class MLXAnimalDetector:
                         'class': class_name,
                         'confidence': float(confidence),
                         'bbox': [x, y, x + w, y + h],
-                        'class_id': 0  # ID générique
+                        'class_id': 0,  # ID générique
+                        # Mesures de forme (stockage des candidats, retirées des résultats)
+                        'contour_area': float(area),
+                        'extent': float(extent)
                     }
                     detections.append(detection)
             
@@ -122,22 +159,20 @@ class MLXAnimalDetector:
             return []
     
     def detect_batch(self, images, confidence_threshold=0.5):
-        """Détecte les objets dans un lot d'images"""
-        all_detections = []
-        
-        for i, image in enumerate(images):
-            logger.info(f"Traitement de l'image {i+1}/{len(images)}")
-            detections = self.detect_objects(image, confidence_threshold)
-            all_detections.append(detections)
-        
-        return all_detections
+        """Détecte les objets dans un lot d'images
+
+        Pas de vrai traitement par lot : la détection (Canny + contours) se
+        fait image par image, sans modèle ; les tampons de travail sont
+        réutilisés d'une image à l'autre.
+        """
+        return [self.detect_objects(image, confidence_threshold) for image in images]
 
 class FastMLXDetector:
     """Version ultra-rapide utilisant des techniques d'optimisation MLX"""
     
     def __init__(self):
         """Initialise le détecteur rapide"""
-        self.device = mx.default_device()
+        self.device = default_device()
         logger.info(f"Détecteur rapide MLX initialisé sur {self.device}")
         
         # Classes d'animaux simplifiées pour la forêt du Jura
@@ -161,87 +196,140 @@ class FastMLXDetector:
         
         # Paramètres optimisés pour la vitesse
         self.input_size = (416, 416)
+        
+        # Noyau de morphologie et tampons de travail réutilisés entre appels
+        self.kernel = cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (5, 5))
+        self.scratch = ScratchBuffers()
     
-    def quick_detect(self, image, confidence_threshold=0.3):
-        """Détection rapide optimisée pour MLX"""
-        try:
-            # Redimensionner rapidement
-            if isinstance(image, np.ndarray):
-                resized = cv2.resize(image, self.input_size)
-                gray = cv2.cvtColor(resized, cv2.COLOR_BGR2GRAY)
-            else:
-                resized = np.array(image.resize(self.input_size))
-                gray = cv2.cvtColor(resized, cv2.COLOR_RGB2GRAY)
-            
-            # Détection rapide basée sur la différence de fond
-            # Utiliser un filtre de Sobel pour détecter les gradients
-            sobelx = cv2.Sobel(gray, cv2.CV_64F, 1, 0, ksize=3)
-            sobely = cv2.Sobel(gray, cv2.CV_64F, 0, 1, ksize=3)
-            magnitude = np.sqrt(sobelx**2 + sobely**2)
-            
-            # Seuillage adaptatif
-            threshold = np.mean(magnitude) + np.std(magnitude)
-            binary = (magnitude > threshold).astype(np.uint8) * 255
+    def _resize_gray(self, image, dst=None):
+        """Redimensionne l'image à input_size et la convertit en niveaux de gris"""
+        width, height = self.input_size
+        if isinstance(image, np.ndarray):
+            resized = self.scratch.get('resized', (height, width) + image.shape[2:], image.dtype)
+            cv2.resize(image, self.input_size, dst=resized)
+            return cv2.cvtColor(resized, cv2.COLOR_BGR2GRAY, dst=dst)
+        resized = np.array(image.resize(self.input_size))
+        return cv2.cvtColor(resized, cv2.COLOR_RGB2GRAY, dst=dst)
+    
+    def _binary_to_detections(self, binary, image, confidence_threshold):
+        """Nettoie le masque binaire et convertit ses contours en détections"""
+        # Morphologie pour nettoyer
+        closed = self.scratch.get('closed', binary.shape, np.uint8)
+        binary = cv2.morphologyEx(binary, cv2.MORPH_CLOSE, self.kernel, dst=closed)
+        
+        # Trouver les contours
+        contours, _ = cv2.findContours(binary, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+        
+        detections = []
+        height, width = binary.shape
+        
+        for contour in contours:
+            area = cv2.contourArea(contour)
+            if area < 500:  # Seuil plus bas pour la détection rapide
+                continue
             
-            # Morphologie pour nettoyer
-            kernel = cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (5, 5))
-            binary = cv2.morphologyEx(binary, cv2.MORPH_CLOSE, kernel)
+            x, y, w, h = cv2.boundingRect(contour)
             
-            # Trouver les contours
-            contours, _ = cv2.findContours(binary, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+            # Filtrer les rectangles trop petits
+            if w < 30 or h < 30:
+                continue
             
-            detections = []
-            height, width = gray.shape
+            # Score de confiance basé sur l'aire et la forme
+            aspect_ratio = w / h
+            extent = area / (w * h)
+            confidence = min(0.8, extent * 0.6 + (1 - abs(aspect_ratio - 1) * 0.2))
             
-            for contour in contours:
-                area = cv2.contourArea(contour)
-                if area < 500:  # Seuil plus bas pour la détection rapide
-                    continue
+            if confidence > confidence_threshold:
+                # Classification rapide
+                if aspect_ratio > 1.3:
+                    class_name = 'bird'
+                elif aspect_ratio < 0.8:
+                    class_name = 'person'
+                else:
+                    class_name = 'animal'
                 
-                x, y, w, h = cv2.boundingRect(contour)
-                
-                # Filtrer les rectangles trop petits
-                if w < 30 or h < 30:
-                    continue
-                
-                # Score de confiance basé sur l'aire et la forme
-                aspect_ratio = w / h
-                extent = area / (w * h)
-                confidence = min(0.8, extent * 0.6 + (1 - abs(aspect_ratio - 1) * 0.2))
+                # Convertir les coordonnées vers l'image originale
+                scale_x = image.shape[1] / width if isinstance(image, np.ndarray) else image.width / width
+                scale_y = image.shape[0] / height if isinstance(image, np.ndarray) else image.height / height
                 
-                if confidence > confidence_threshold:
-                    # Classification rapide
-                    if aspect_ratio > 1.3:
-                        class_name = 'bird'
-                    elif aspect_ratio < 0.8:
-                        class_name = 'person'
-                    else:
-                        class_name = 'animal'
-                    
-                    # Convertir les coordonnées vers l'image originale
-                    scale_x = image.shape[1] / width if isinstance(image, np.ndarray) else image.width / width
-                    scale_y = image.shape[0] / height if isinstance(image, np.ndarray) else image.height / height
-                    
-                    detections.append({
-                        'class': class_name,
-                        'confidence': float(confidence),
-                        'bbox': [int(x * scale_x), int(y * scale_y), 
-                                int((x + w) * scale_x), int((y + h) * scale_y)],
-                        'class_id': 0
-                    })
-            
-            return detections
+                detections.append({
+                    'class': class_name,
+                    'confidence': float(confidence),
+                    'bbox': [int(x * scale_x), int(y * scale_y), 
+                            int((x + w) * scale_x), int((y + h) * scale_y)],
+                    'class_id': 0,
+                    # Mesures de forme à la résolution de travail (input_size), celle
+                    # du seuil d'aire ; pour le stockage des candidats
+                    'contour_area': float(area),
+                    'extent': float(extent)
+                })
+        
+        return detections
+    
+    def _detect_stack(self, images, confidence_threshold):
+        """Noyau commun à quick_detect et quick_detect_batch
+
+        Les frames sont réduites dans une pile (N, H, W) ; gradients de Sobel
+        (float32, exacts pour des entrées uint8), magnitude, seuils moyenne +
+        écart-type et binarisation sont calculés sur la pile entière, dans des
+        tampons réutilisés. Seuls la morphologie et les contours restent par
+        frame.
+        """
+        count = len(images)
+        width, height = self.input_size
+        shape = (count, height, width)
+        gray = self.scratch.get('gray', shape, np.uint8)
+        sobelx = self.scratch.get('sobelx', shape, np.float32)
+        sobely = self.scratch.get('sobely', shape, np.float32)
+        for i, image in enumerate(images):
+            self._resize_gray(image, dst=gray[i])
+            cv2.Sobel(gray[i], cv2.CV_32F, 1, 0, dst=sobelx[i], ksize=3)
+            cv2.Sobel(gray[i], cv2.CV_32F, 0, 1, dst=sobely[i], ksize=3)
+        
+        # Magnitude sur toute la pile vue comme une seule image (N*H, W) :
+        # opération élément par élément, sans effet de bord entre frames
+        magnitude = self.scratch.get('magnitude', shape, np.float32)
+        cv2.magnitude(sobelx.reshape(-1, width), sobely.reshape(-1, width), magnitude.reshape(-1, width))
+        
+        # Seuillage adaptatif par frame : moyenne + écart-type, accumulés en float64
+        pixels = height * width
+        means = magnitude.reshape(count, -1).sum(axis=1, dtype=np.float64) / pixels
+        deviations = self.scratch.get('deviations', shape, np.float32)
+        np.subtract(magnitude, means[:, None, None], out=deviations, casting='same_kind')
+        np.square(deviations, out=deviations)
+        stds = np.sqrt(deviations.reshape(count, -1).sum(axis=1, dtype=np.float64) / pixels)
+        thresholds = means + stds
+        
+        mask = self.scratch.get('mask', shape, np.bool_)
+        np.greater(magnitude, thresholds[:, None, None], out=mask)
+        binary = mask.view(np.uint8)
+        np.multiply(binary, 255, out=binary)
+        
+        return [self._binary_to_detections(binary[i], image, confidence_threshold)
+                for i, image in enumerate(images)]
+    
+    def quick_detect(self, image, confidence_threshold=0.3):
+        """Détection rapide optimisée pour MLX"""
+        try:
+            return self._detect_stack([image], confidence_threshold)[0]
             
         except Exception as e:
             logger.error(f"Erreur détection rapide: {e}")
             return []
+    
+    def quick_detect_batch(self, images, confidence_threshold=0.3):
+        """Détection rapide sur toutes les frames d'un clip en une passe vectorisée
 
-def create_detector(detector_type="fast"):
-    """Factory pour créer le bon détecteur"""
-    if detector_type == "fast":
-        return FastMLXDetector()
-    else:
-        return MLXAnimalDetector()
+        Le résultat est identique à quick_detect appliqué à chaque frame.
+        """
+        if not images:
+            return []
+        try:
+            return self._detect_stack(images, confidence_threshold)
+            
+        except Exception as e:
+            logger.error(f"Erreur détection rapide par lot: {e}")
+            return [[] for _ in images]
 
 if __name__ == "__main__":
     # Test du détecteur
@@ -249,11 +337,13 @@ if __name__ == "__main__":
     
     parser = argparse.ArgumentParser(description="Test du détecteur MLX")
     parser.add_argument("image_path", help="Chemin vers l'image de test")
-    parser.add_argument("--type", choices=["fast", "accurate"], default="fast", help="Type de détecteur")
+    parser.add_argument("--type", choices=list(DETECTOR_REGISTRY), default="fast", help="Type de détecteur")
+    parser.add_argument("--model", help="Modèle ONNX (détecteur onnx)")
     
     args = parser.parse_args()
     
-    detector = create_detector(args.type)
+    options = {'model_path': args.model} if args.model else {}
+    detector = create_detector(args.type, **options)
     
     # Charger et analyser l'image
     image = cv2.imread(args.image_path)
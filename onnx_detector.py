@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""
+Détecteur neuronal sur CPU via ONNX Runtime
+Exécute un modèle YOLO exporté en ONNX sur des lots de frames complets
+"""
+
+import ast
+import logging
+import numpy as np
+import cv2
+
+logger = logging.getLogger(__name__)
+
+# Classes COCO utiles pour un piège photo (modèles YOLO génériques)
+COCO_WILDLIFE_CLASSES = {
+    0: 'person',
+    14: 'bird',
+    15: 'cat',
+    16: 'dog',
+    17: 'horse',
+    18: 'sheep',
+    19: 'cow',
+    21: 'bear'
+}
+
+class OnnxDetector:
+    def __init__(self, model_path="yolov8n.onnx", model_format="yolov8", input_size=(640, 640),
+                 batch_size=8, intra_op_threads=None, nms_threshold=0.45, class_names=None):
+        """Charge le modèle ONNX sur le fournisseur CPU
+
+        model_format : "yolov8" (sortie (N, 4 + C, A)) ou "yolov5" (sortie
+        (N, A, 5 + C) avec score d'objet, ex. MegaDetector v5).
+        intra_op_threads : threads utilisés par une inférence ; à réduire
+        quand plusieurs processus d'analyse tournent en parallèle.
+        class_names : {id: nom} ; par défaut lu dans les métadonnées du
+        modèle (export Ultralytics), sinon classes COCO utiles au piège photo.
+        Les classes absentes de class_names sont ignorées.
+        """
+        try:
+            import onnxruntime as ort
+        except ImportError as e:
+            raise ImportError("Le détecteur 'onnx' nécessite onnxruntime (pip install onnxruntime)") from e
+
+        options = ort.SessionOptions()
+        if intra_op_threads:
+            options.intra_op_num_threads = intra_op_threads
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        self.session = ort.InferenceSession(model_path, sess_options=options,
+                                            providers=["CPUExecutionProvider"])
+
+        model_input = self.session.get_inputs()[0]
+        self.input_name = model_input.name
+        self.model_format = model_format
+        self.input_size = input_size
+        self.nms_threshold = nms_threshold
+
+        # Un modèle exporté avec un lot fixe à 1 est exécuté image par image
+        fixed_batch = model_input.shape[0]
+        self.batch_size = 1 if fixed_batch == 1 else batch_size
+
+        self.class_names = class_names or self._model_class_names() or COCO_WILDLIFE_CLASSES
+        logger.info(f"Détecteur ONNX initialisé ({model_path}, lot de {self.batch_size}, "
+                    f"{intra_op_threads or 'auto'} threads)")
+
+    def _model_class_names(self):
+        """Lit les noms de classes des métadonnées du modèle (export Ultralytics)"""
+        names = self.session.get_modelmeta().custom_metadata_map.get('names')
+        if not names:
+            return None
+        try:
+            return {int(k): v for k, v in ast.literal_eval(names).items()}
+        except (ValueError, SyntaxError, AttributeError):
+            logger.warning("Noms de classes du modèle illisibles, classes COCO utilisées")
+            return None
+
+    def preprocess_batch(self, images):
+        """Convertit N frames BGR en un tenseur (N, 3, H, W) float32 normalisé"""
+        return cv2.dnn.blobFromImages(images, scalefactor=1 / 255.0, size=self.input_size,
+                                      swapRB=True, crop=False)
+
+    def _decode(self, output, image, confidence_threshold):
+        """Convertit la sortie brute d'une image en détections (après NMS)"""
+        if self.model_format == "yolov8":
+            predictions = output.T  # (A, 4 + C)
+            boxes = predictions[:, :4]
+            class_scores = predictions[:, 4:]
+        else:
+            predictions = output  # (A, 5 + C)
+            boxes = predictions[:, :4]
+            class_scores = predictions[:, 5:] * predictions[:, 4:5]
+
+        class_ids = class_scores.argmax(axis=1)
+        scores = class_scores[np.arange(len(class_ids)), class_ids]
+        keep = scores > confidence_threshold
+        if not keep.any():
+            return []
+        boxes, scores, class_ids = boxes[keep], scores[keep], class_ids[keep]
+
+        # Boîtes (cx, cy, w, h) du modèle -> (x, y, w, h) de l'image d'origine
+        scale_x = image.shape[1] / self.input_size[0]
+        scale_y = image.shape[0] / self.input_size[1]
+        xywh = np.empty_like(boxes)
+        xywh[:, 0] = (boxes[:, 0] - boxes[:, 2] / 2) * scale_x
+        xywh[:, 1] = (boxes[:, 1] - boxes[:, 3] / 2) * scale_y
+        xywh[:, 2] = boxes[:, 2] * scale_x
+        xywh[:, 3] = boxes[:, 3] * scale_y
+
+        indices = cv2.dnn.NMSBoxesBatched(xywh.tolist(), scores.tolist(), class_ids.tolist(),
+                                          confidence_threshold, self.nms_threshold)
+
+        detections = []
+        for i in np.array(indices).flatten():
+            class_id = int(class_ids[i])
+            if class_id not in self.class_names:
+                continue
+            x, y, w, h = xywh[i]
+            detections.append({
+                'class': self.class_names[class_id],
+                'confidence': float(scores[i]),
+                'bbox': [int(x), int(y), int(x + w), int(y + h)],
+                'class_id': class_id
+            })
+        return detections
+
+    def detect_batch(self, images, confidence_threshold=0.5):
+        """Détecte les objets dans un lot d'images, une inférence par lot"""
+        all_detections = []
+        for start in range(0, len(images), self.batch_size):
+            chunk = images[start:start + self.batch_size]
+            try:
+                blob = self.preprocess_batch(chunk)
+                outputs = self.session.run(None, {self.input_name: blob})[0]
+                all_detections.extend(self._decode(output, image, confidence_threshold)
+                                      for output, image in zip(outputs, chunk))
+            except Exception as e:
+                logger.error(f"Erreur détection ONNX: {e}")
+                all_detections.extend([] for _ in chunk)
+        return all_detections
+
+    def quick_detect(self, image, confidence_threshold=0.5):
+        """Détection sur une seule image (même interface que FastMLXDetector)"""
+        return self.detect_batch([image], confidence_threshold)[0]
@@ -7,18 +7,22 @@ import json
 import datetime
 from collections import defaultdict, Counter
 from pathlib import Path
+from results_io import load_results
 
 class ReportGenerator:
-    def __init__(self, results_file="analysis_results.json"):
-        """Initialise le générateur de rapports"""
+    def __init__(self, results_file="analysis_results.json", results=None):
+        """Initialise le générateur de rapports
+
+        results : résultats déjà en mémoire (pipeline de run_analysis.py) ;
+        results_file n'est alors pas lu.
+        """
         self.results_file = results_file
-        self.results = self.load_results()
+        self.results = results if results is not None else self.load_results()
     
     def load_results(self):
-        """Charge les résultats d'analyse"""
+        """Charge les résultats d'analyse (JSON ou JSON Lines)"""
         try:
-            with open(self.results_file, 'r', encoding='utf-8') as f:
-                return json.load(f)
+            return load_results(self.results_file)
         except FileNotFoundError:
             print(f"Fichier {self.results_file} non trouvé")
             return []
@@ -64,6 +68,8 @@ Généré le: {datetime.datetime.now().strftime('%d/%m/%Y %H:%M')}
         if not animal_counts:
             summary += "- Aucun animal détecté\n"
         
+        summary += self.generate_prefilter_summary()
+        
         summary += f"""
 📈 VIDÉOS LES PLUS ACTIVES:
 """
@@ -76,6 +82,25 @@ Généré le: {datetime.datetime.now().strftime('%d/%m/%Y %H:%M')}
         
         return summary
     
+    def generate_prefilter_summary(self):
+        """Résumé du préfiltre de mouvement, pour ajuster son seuil"""
+        scored = [r for r in self.results if 'motion_score' in r]
+        if not scored:
+            return ""
+        
+        skipped = [r for r in scored if r.get('prefilter_skipped')]
+        summary = f"""
+🌬️ PRÉFILTRE DE MOUVEMENT:
+- Clips déclarés vides sans détection: {len(skipped)}/{len(scored)}
+"""
+        # Seuil maximal qui n'aurait écarté aucun clip avec détections
+        detected_scores = [r['motion_score'] for r in scored if r['detection_count'] > 0]
+        if detected_scores:
+            summary += f"- Score minimal d'un clip avec détections: {min(detected_scores):.2f}\n"
+        if skipped:
+            summary += f"- Score maximal d'un clip ignoré: {max(r['motion_score'] for r in skipped):.2f}\n"
+        return summary
+    
     def generate_detailed_report(self):
         """Génère un rapport détaillé"""
         if not self.results:
@@ -114,8 +139,8 @@ Généré le: {datetime.datetime.now().strftime('%d/%m/%Y %H:%M')}
         print(f"Rapport sauvegardé dans {filename}")
         return filename
     
-    def export_json_summary(self, filename="summary.json"):
-        """Exporte un résumé en JSON pour l'interface web"""
+    def build_json_summary(self):
+        """Construit le résumé destiné à l'interface web"""
         if not self.results:
             return {}
         
@@ -155,6 +180,14 @@ Généré le: {datetime.datetime.now().strftime('%d/%m/%Y %H:%M')}
             "all_results": self.results
         }
         
+        return summary
+    
+    def export_json_summary(self, filename="summary.json"):
+        """Exporte un résumé en JSON pour l'interface web"""
+        summary = self.build_json_summary()
+        if not summary:
+            return {}
+        
         with open(filename, 'w', encoding='utf-8') as f:
             json.dump(summary, f, indent=2, ensure_ascii=False)
         
@@ -165,7 +198,7 @@ def main():
     import argparse
     
     parser = argparse.ArgumentParser(description="Générateur de rapports")
-    parser.add_argument("--input", "-i", default="analysis_results.json", help="Fichier de résultats")
+    parser.add_argument("--input", "-i", default="analysis_results.json", help="Fichier de résultats (.json ou .jsonl)")
     parser.add_argument("--output", "-o", default="rapport_piege_photo.txt", help="Fichier de rapport")
     parser.add_argument("--json", action="store_true", help="Exporter aussi en JSON")
     
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Lecture et écriture des fichiers de résultats d'analyse
+Supporte le JSON classique (liste) et le JSON Lines (une vidéo par ligne)
+"""
+
+import os
+import json
+import logging
+
+logger = logging.getLogger(__name__)
+
+class JsonlResultWriter:
+    def __init__(self, output_file, append=False):
+        """Ouvre le fichier de sortie JSON Lines (tronqué au démarrage)
+
+        append : ajoute à la suite des résultats existants (mode veille) ;
+        une dernière ligne incomplète est terminée pour ne pas être fusionnée
+        avec la suivante.
+        """
+        self.output_file = output_file
+        self.video_count = 0
+        self.detection_count = 0
+        self.file = open(output_file, 'a' if append else 'w', encoding='utf-8')
+        if append and self.file.tell() > 0:
+            with open(output_file, 'rb') as f:
+                f.seek(-1, 2)
+                if f.read(1) != b"\n":
+                    self.file.write("\n")
+
+    def write(self, result):
+        """Ajoute le résultat d'une vidéo et le pousse immédiatement sur disque"""
+        self.file.write(json.dumps(result, ensure_ascii=False) + "\n")
+        self.file.flush()
+        self.video_count += 1
+        self.detection_count += result['detection_count']
+
+    def close(self):
+        """Ferme le fichier de sortie"""
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+def is_jsonl_file(results_file):
+    """Indique si le fichier est au format JSON Lines plutôt qu'une liste JSON"""
+    with open(results_file, 'r', encoding='utf-8') as f:
+        for line in f:
+            stripped = line.strip()
+            if stripped:
+                return not stripped.startswith('[')
+    return False
+
+def iter_results(results_file):
+    """Parcourt les résultats d'un fichier JSON ou JSON Lines
+
+    Le JSON Lines est lu ligne par ligne ; une ligne incomplète (analyse
+    interrompue pendant l'écriture) est ignorée avec un avertissement.
+    """
+    if not is_jsonl_file(results_file):
+        with open(results_file, 'r', encoding='utf-8') as f:
+            yield from json.load(f)
+        return
+
+    with open(results_file, 'r', encoding='utf-8') as f:
+        for line_number, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError:
+                logger.warning(f"{results_file}:{line_number}: ligne invalide ignorée")
+
+def load_results(results_file):
+    """Charge tous les résultats d'un fichier JSON ou JSON Lines"""
+    return list(iter_results(results_file))
+
+def write_results(results, output_file):
+    """Écrit une liste de résultats (JSON Lines si l'extension est .jsonl)
+
+    Écriture dans un fichier temporaire puis renommage : plusieurs processus
+    peuvent exporter le même fichier sans le laisser à moitié écrit.
+    """
+    tmp_file = f"{output_file}.{os.getpid()}.tmp"
+    if output_file.endswith(".jsonl"):
+        with JsonlResultWriter(tmp_file) as writer:
+            for result in results:
+                writer.write(result)
+    else:
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2, ensure_ascii=False)
+    os.replace(tmp_file, output_file)
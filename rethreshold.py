@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+"""
+Nouveau seuil de confiance sans réanalyse
+Régénère résultats, rapport et résumé à partir des candidats conservés
+par video_analyzer.py --candidates, sans relire les vidéos
+"""
+
+import json
+from candidate_store import CandidateStore
+from results_io import JsonlResultWriter
+from report_generator import ReportGenerator
+
+def main():
+    """Fonction principale"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Régénère les résultats à un autre seuil de confiance")
+    parser.add_argument("candidates", help="Fichier de candidats (.npz) produit par video_analyzer.py --candidates")
+    parser.add_argument("--threshold", "-t", type=float, default=0.5, help="Seuil de confiance")
+    parser.add_argument("--min-contour-area", type=float,
+                        help="Aire de contour minimale (résolution de travail du détecteur heuristique)")
+    parser.add_argument("--min-extent", type=float, help="Étendue minimale (aire du contour / aire de la boîte)")
+    parser.add_argument("--output", "-o", default="analysis_results.json",
+                        help="Fichier de résultats (.json ou .jsonl)")
+    parser.add_argument("--detections", choices=["raw", "events", "both"], default="raw",
+                        help="Détections par frame (raw), regroupées en événements (events) ou les deux")
+    parser.add_argument("--report", help="Générer aussi le rapport texte dans ce fichier")
+    parser.add_argument("--json", action="store_true", help="Exporter aussi le résumé JSON (summary.json)")
+
+    args = parser.parse_args()
+
+    results = CandidateStore.results_at(args.candidates, args.threshold, args.detections,
+                                        args.min_contour_area, args.min_extent)
+    if args.output.endswith(".jsonl"):
+        with JsonlResultWriter(args.output) as writer:
+            for result in results:
+                writer.write(result)
+    else:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2, ensure_ascii=False)
+    total_detections = sum(r['detection_count'] for r in results)
+    print(f"Seuil {args.threshold}: {len(results)} vidéos, {total_detections} détections -> {args.output}")
+
+    if args.report or args.json:
+        generator = ReportGenerator(args.output)
+        if args.report:
+            generator.save_report(args.report)
+        if args.json:
+            generator.export_json_summary("summary.json")
+            print("Résumé JSON exporté dans summary.json")
+
+if __name__ == "__main__":
+    main()
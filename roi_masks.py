@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+"""
+Masques de zones d'intérêt (ROI) par caméra
+Exclut de la détection les zones statiques d'une caméra (bandeau d'horodatage
+et de température, ciel, feuillage) avant le calcul des gradients et contours
+"""
+
+import os
+import json
+import fnmatch
+import hashlib
+import logging
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+# Version du traitement des pixels masqués (remplissage neutre, boîtes à cheval
+# écartées), incluse dans la signature : invalide les analyses en cache
+ROI_PROCESSING_VERSION = 2
+
+class RoiMask:
+    def __init__(self, keep):
+        """Masque à la résolution des frames : non nul = zone analysée
+
+        Les frames sont recadrées sur le rectangle englobant la zone analysée ;
+        si celle-ci n'est pas rectangulaire, les pixels masqués restants du
+        recadrage sont remplis par une moyenne floue des pixels analysés
+        voisins : une mise à zéro créerait un contour franc le long du masque.
+        """
+        import cv2
+        import numpy as np
+
+        self.keep = keep
+        x, y, w, h = cv2.boundingRect(keep)
+        if w == 0 or h == 0:
+            raise ValueError("Masque ROI vide : aucune zone à analyser")
+        self.box = (x, y, w, h)
+        self.crop_keep = keep[y:y + h, x:x + w]
+        self.rectangular = cv2.countNonZero(self.crop_keep) == w * h
+        # Somme cumulée des pixels masqués : fraction masquée d'une boîte en O(1)
+        self.masked_sum = cv2.integral((keep == 0).astype(np.uint8))
+        if not self.rectangular:
+            # Remplissage calculé à 1/8 de la résolution (flou normalisé : seuls
+            # les pixels analysés y contribuent), puis agrandi
+            self.fill_size = (max(1, w // 8), max(1, h // 8))
+            self.fill_kernel = (5, 5)
+            small_keep = cv2.resize((self.crop_keep > 0).astype(np.float32), self.fill_size,
+                                    interpolation=cv2.INTER_AREA)
+            self.fill_keep_sum = float(small_keep.sum())
+            self.fill_weight = cv2.blur(small_keep, self.fill_kernel)
+            self.fill_pixels = (self.crop_keep == 0).view(np.uint8)
+
+    @classmethod
+    def from_polygons(cls, polygons, width, height):
+        """Masque à partir de polygones à ignorer, en coordonnées relatives (0-1)"""
+        import cv2
+        import numpy as np
+
+        keep = np.full((height, width), 255, dtype=np.uint8)
+        points = [np.round(np.array(polygon, dtype=np.float64) * (width, height)).astype(np.int32)
+                  for polygon in polygons]
+        cv2.fillPoly(keep, points, 0)
+        return cls(keep)
+
+    @classmethod
+    def from_image(cls, mask_file, width, height):
+        """Masque à partir d'une image (blanc = analysé, noir = ignoré)"""
+        import cv2
+
+        image = cv2.imread(str(mask_file), cv2.IMREAD_GRAYSCALE)
+        if image is None:
+            raise IOError(f"Impossible de lire le masque ROI {mask_file}")
+        if image.shape != (height, width):
+            image = cv2.resize(image, (width, height), interpolation=cv2.INTER_NEAREST)
+        _, keep = cv2.threshold(image, 127, 255, cv2.THRESH_BINARY)
+        return cls(keep)
+
+    def apply(self, frame):
+        """Recadre la frame sur la zone analysée et neutralise les pixels masqués
+
+        Les pixels masqués prennent la moyenne floue des pixels analysés
+        proches (leur moyenne globale là où aucun n'est à portée du flou) :
+        le bord du masque ne produit pas de gradient parasite.
+        """
+        import cv2
+        import numpy as np
+
+        x, y, w, h = self.box
+        crop = frame[y:y + h, x:x + w]
+        if self.rectangular:
+            return crop
+        kept = cv2.bitwise_and(crop, crop, mask=self.crop_keep)
+        small = cv2.resize(kept, self.fill_size, interpolation=cv2.INTER_AREA).astype(np.float32)
+        small = small.reshape(self.fill_weight.shape + crop.shape[2:])
+        weight = self.fill_weight.reshape(self.fill_weight.shape + (1,) * (crop.ndim - 2))
+        local_sum = cv2.blur(small, self.fill_kernel).reshape(small.shape)
+        # Moyenne des pixels analysés là où aucun n'est à portée du flou
+        mean = small.sum(axis=(0, 1)) / max(self.fill_keep_sum, 1e-3)
+        fill = np.where(weight > 1e-3, local_sum / np.maximum(weight, 1e-3), mean)
+        fill = cv2.resize(fill.round().astype(crop.dtype), (w, h), interpolation=cv2.INTER_LINEAR)
+        return cv2.copyTo(fill.reshape(crop.shape), self.fill_pixels, crop.copy())
+
+    def to_frame(self, detections, max_masked=0.2):
+        """Ramène les détections du recadrage dans les coordonnées de la frame
+
+        Les détections dont le centre tombe dans une zone masquée, ou qui
+        débordent sur le masque de plus de max_masked de leur surface (boîte à
+        cheval sur le bord du masque), sont écartées.
+        """
+        x, y, _, _ = self.box
+        height, width = self.keep.shape
+        kept = []
+        for detection in detections:
+            x1, y1, x2, y2 = detection['bbox']
+            bbox = [x1 + x, y1 + y, x2 + x, y2 + y]
+            center_x = min(width - 1, (bbox[0] + bbox[2]) // 2)
+            center_y = min(height - 1, (bbox[1] + bbox[3]) // 2)
+            if not self.keep[center_y, center_x]:
+                continue
+            if self.masked_fraction(bbox) > max_masked:
+                continue
+            detection['bbox'] = bbox
+            kept.append(detection)
+        return kept
+
+    def masked_fraction(self, bbox):
+        """Part de la boîte (coordonnées de la frame) couverte par le masque"""
+        height, width = self.keep.shape
+        x1, y1 = max(0, int(bbox[0])), max(0, int(bbox[1]))
+        x2, y2 = min(width, int(bbox[2])), min(height, int(bbox[3]))
+        if x2 <= x1 or y2 <= y1:
+            return 1.0
+        s = self.masked_sum
+        masked = s[y2, x2] - s[y1, x2] - s[y2, x1] + s[y1, x1]
+        return float(masked) / ((x2 - x1) * (y2 - y1))
+
+class RoiMaskConfig:
+    def __init__(self, config_file="roi_masks.json"):
+        """Règles de masquage par caméra, lues depuis un fichier JSON
+
+        Format :
+            {"cameras": [
+                {"pattern": "*/camera_nord/*", "ignore": [[[0, 0.92], [1, 0.92], [1, 1], [0, 1]]]},
+                {"pattern": "CAM2_*", "mask": "masques/cam2.png"}
+            ]}
+        pattern (fnmatch) est comparé au chemin de la vidéo puis à son nom de
+        fichier ; la première règle qui correspond s'applique. ignore liste
+        des polygones à exclure en coordonnées relatives à la frame ; mask est
+        une image (relative au fichier de configuration) où le noir est exclu.
+        """
+        self.config_file = config_file
+        self.rules = []
+        self._masks = {}
+        self.load()
+
+    def load(self):
+        """Charge les règles du fichier de configuration"""
+        with open(self.config_file, 'r', encoding='utf-8') as f:
+            config = json.load(f)
+
+        base_dir = Path(self.config_file).parent
+        self.rules = []
+        for rule in config.get('cameras', []):
+            if 'pattern' not in rule or ('ignore' not in rule and 'mask' not in rule):
+                raise ValueError(f"Règle ROI invalide dans {self.config_file}: {rule}")
+            rule = dict(rule)
+            if 'mask' in rule:
+                rule['mask'] = str(base_dir / rule['mask'])
+            self.rules.append(rule)
+        logger.info(f"{len(self.rules)} règles de masquage ROI chargées depuis {self.config_file}")
+
+    def signature(self):
+        """Empreinte des règles (et des images de masque), pour la clé du cache"""
+        digest = hashlib.sha256(json.dumps(self.rules, sort_keys=True).encode('utf-8'))
+        digest.update(str(ROI_PROCESSING_VERSION).encode('ascii'))
+        for rule in self.rules:
+            if 'mask' in rule and os.path.exists(rule['mask']):
+                digest.update(str(os.stat(rule['mask']).st_mtime_ns).encode('ascii'))
+        return digest.hexdigest()[:16]
+
+    def match(self, video_path):
+        """Index de la règle qui s'applique à la vidéo, ou None"""
+        path = Path(video_path).as_posix()
+        filename = os.path.basename(path)
+        for index, rule in enumerate(self.rules):
+            if fnmatch.fnmatch(path, rule['pattern']) or fnmatch.fnmatch(filename, rule['pattern']):
+                return index
+        return None
+
+    def mask_for(self, video_path, width, height):
+        """RoiMask de la vidéo à sa résolution (mis en cache), ou None sans règle"""
+        index = self.match(video_path)
+        if index is None:
+            return None
+
+        key = (index, width, height)
+        if key not in self._masks:
+            rule = self.rules[index]
+            if 'mask' in rule:
+                self._masks[key] = RoiMask.from_image(rule['mask'], width, height)
+            else:
+                self._masks[key] = RoiMask.from_polygons(rule['ignore'], width, height)
+        return self._masks[key]
@@ -1,28 +1,67 @@
 #!/usr/bin/env python3
 """
 Script principal pour lancer l'analyse complète des vidéos de piège photo
+Analyse, rapport et interface web s'enchaînent dans le même processus : les
+résultats passent en mémoire d'une étape à l'autre
 """
 
 import os
 import sys
-import subprocess
+import json
 from pathlib import Path
 
-def run_command(cmd, description):
-    """Exécute une commande et affiche le résultat"""
-    print(f"\n🔄 {description}")
-    print(f"Commande: {' '.join(cmd)}")
+def run_pipeline(video_path, detector_type="fast", results_file="analysis_results.json",
+                 report_file="rapport_piege_photo.txt", summary_file="summary.json"):
+    """Analyse les vidéos puis génère rapport et résumé, sans sous-processus
+
+    La progression est affichée vidéo par vidéo. Les fichiers (résultats,
+    rapport, résumé) sont des artefacts optionnels : None pour ne pas les
+    écrire. Retourne (résultats, résumé pour l'interface web).
+    """
+    from video_analyzer import VideoAnalyzer
+    from report_generator import ReportGenerator
     
-    try:
-        result = subprocess.run(cmd, check=True, capture_output=True, text=True)
-        print(f"✅ {description} - Terminé")
-        if result.stdout:
-            print(result.stdout)
-        return True
-    except subprocess.CalledProcessError as e:
-        print(f"❌ Erreur lors de {description}")
-        print(f"Erreur: {e.stderr}")
-        return False
+    print("\n🔄 Analyse des vidéos")
+    analyzer = VideoAnalyzer(detector_type=detector_type)
+    if os.path.isfile(video_path):
+        video_files = [Path(video_path)]
+    else:
+        video_files = analyzer.find_video_files(video_path)
+    
+    results = []
+    failures = []
+    
+    def report_failure(video_file, error):
+        failures.append(video_file)
+        print(f"  [{len(results) + len(failures)}/{len(video_files)}] ❌ {Path(video_file).name}: {error}",
+              flush=True)
+    
+    for result in analyzer.iter_directory_results(video_files, on_error=report_failure):
+        results.append(result)
+        print(f"  [{len(results) + len(failures)}/{len(video_files)}] {result['filename']}: "
+              f"{result['detection_count']} détections", flush=True)
+    print(f"✅ Analyse terminée: {len(results)} vidéos, "
+          f"{sum(r['detection_count'] for r in results)} détections au total"
+          + (f", {len(failures)} en erreur" if failures else ""))
+    
+    if results_file:
+        with open(results_file, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2, ensure_ascii=False)
+        print(f"💾 Résultats sauvegardés dans {results_file}")
+    
+    print("\n🔄 Génération du rapport")
+    generator = ReportGenerator(results_file, results=results)
+    summary = generator.build_json_summary()
+    if report_file:
+        generator.save_report(report_file)
+    else:
+        print(generator.generate_summary())
+    if summary_file and summary:
+        with open(summary_file, 'w', encoding='utf-8') as f:
+            json.dump(summary, f, indent=2, ensure_ascii=False)
+        print(f"💾 Résumé JSON exporté dans {summary_file}")
+    
+    return results, summary
 
 def main():
     """Script principal d'analyse"""
@@ -35,6 +74,7 @@ def main():
         print("\nOptions:")
         print("  --no-web     : Ne pas lancer l'interface web")
         print("  --port PORT  : Port pour l'interface web (défaut: 5000)")
+        print("  --no-files   : Ne pas écrire les résultats, le rapport et le résumé sur disque")
         print("\nExemple:")
         print("  python run_analysis.py /chemin/vers/mes/videos")
         print("  python run_analysis.py ./videos --no-web")
@@ -42,6 +82,7 @@ def main():
     
     video_path = sys.argv[1]
     launch_web = "--no-web" not in sys.argv
+    write_files = "--no-files" not in sys.argv
     port = "5000"
     
     # Extraire le port si spécifié
@@ -71,38 +112,35 @@ def main():
         except (IndexError, ValueError):
             print("❌ Type de détecteur invalide, utilisation du mode rapide")
     
-    if not run_command([
-        "python", "video_analyzer.py", video_path, "--output", "analysis_results.json", "--detector", detector_type
-    ], "Analyse des vidéos avec MLX"):
-        print("❌ L'analyse a échoué")
-        sys.exit(1)
-    
-    # Étape 2: Générer le rapport
-    if not run_command([
-        "python", "report_generator.py", "--input", "analysis_results.json", "--json"
-    ], "Génération du rapport"):
-        print("❌ La génération du rapport a échoué")
+    # Étapes 1 et 2: Analyser les vidéos et générer le rapport
+    try:
+        if write_files:
+            results, summary = run_pipeline(video_path, detector_type)
+        else:
+            results, summary = run_pipeline(video_path, detector_type, None, None, None)
+    except Exception as e:
+        print(f"❌ L'analyse a échoué: {e}")
         sys.exit(1)
     
-    # Étape 3: Lancer l'interface web (optionnel)
+    # Étape 3: Lancer l'interface web (optionnel), sur les résultats en mémoire
     if launch_web:
         print(f"\n🌐 Lancement de l'interface web sur le port {port}")
         print("📱 Ouvrez votre navigateur sur: http://localhost:" + port)
         print("⏹️  Appuyez sur Ctrl+C pour arrêter le serveur")
         
         try:
-            cmd = ["python", "web_interface.py", "--port", port]
-            if video_path and os.path.isdir(video_path):
-                cmd.extend(["--video-dir", video_path])
-            subprocess.run(cmd, check=True)
+            from web_interface import WebInterface, serve
+            video_dir = video_path if os.path.isdir(video_path) else None
+            serve(WebInterface(video_dir=video_dir, data=summary), port=int(port))
         except KeyboardInterrupt:
             print("\n👋 Interface web arrêtée")
-        except subprocess.CalledProcessError as e:
+        except Exception as e:
             print(f"❌ Erreur lors du lancement de l'interface web: {e}")
     else:
         print("\n✅ Analyse terminée!")
-        print("📄 Consultez le fichier 'rapport_piege_photo.txt' pour le rapport détaillé")
-        print("🌐 Pour lancer l'interface web plus tard: python web_interface.py")
+        if write_files:
+            print("📄 Consultez le fichier 'rapport_piege_photo.txt' pour le rapport détaillé")
+            print("🌐 Pour lancer l'interface web plus tard: python web_interface.py")
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
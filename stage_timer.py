@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Chronométrage par étape du pipeline d'analyse
+Mesure ouverture, métadonnées, extraction, détection et écriture à faible coût
+"""
+
+import json
+import math
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+
+class StageTimer:
+    def __init__(self):
+        """Accumule la durée (en secondes) de chaque étape pour une vidéo"""
+        self.durations = {}
+
+    def add(self, stage, seconds):
+        """Ajoute une durée à une étape"""
+        self.durations[stage] = self.durations.get(stage, 0.0) + seconds
+
+    @contextmanager
+    def stage(self, name):
+        """Chronomètre le bloc sous le nom d'étape donné"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - start)
+
+    def timed_iter(self, name, iterable):
+        """Parcourt un itérable en chronométrant chaque élément produit
+
+        Utile pour les générateurs paresseux (extraction des frames) dont le
+        travail est fait à chaque next().
+        """
+        iterator = iter(iterable)
+        while True:
+            start = time.perf_counter()
+            try:
+                item = next(iterator)
+            except StopIteration:
+                self.add(name, time.perf_counter() - start)
+                return
+            self.add(name, time.perf_counter() - start)
+            yield item
+
+    def as_dict(self):
+        """Durées arrondies à la microseconde, pour le résultat JSON"""
+        return {stage: round(seconds, 6) for stage, seconds in self.durations.items()}
+
+def percentile(sorted_values, fraction):
+    """Percentile au rang le plus proche d'une liste déjà triée"""
+    if not sorted_values:
+        return 0.0
+    rank = max(0, min(len(sorted_values) - 1, math.ceil(fraction * len(sorted_values)) - 1))
+    return sorted_values[rank]
+
+class TimingStats:
+    def __init__(self):
+        """Agrège les durées par étape sur toutes les vidéos d'une exécution"""
+        self.samples = defaultdict(list)
+        self.videos = []
+
+    def add(self, stage, seconds):
+        """Ajoute une mesure isolée (par ex. l'écriture finale)"""
+        self.samples[stage].append(seconds)
+
+    def add_video(self, filename, timings):
+        """Ajoute les durées par étape d'une vidéo"""
+        for stage, seconds in timings.items():
+            self.samples[stage].append(seconds)
+        self.videos.append({'filename': filename, 'timings': timings})
+
+    def summary(self):
+        """Statistiques par étape : nombre, total, moyenne, p50 et p95 (secondes)"""
+        summary = {}
+        for stage, values in self.samples.items():
+            ordered = sorted(values)
+            summary[stage] = {
+                'count': len(ordered),
+                'total': round(sum(ordered), 6),
+                'mean': round(sum(ordered) / len(ordered), 6),
+                'p50': round(percentile(ordered, 0.50), 6),
+                'p95': round(percentile(ordered, 0.95), 6)
+            }
+        return summary
+
+    def log_summary(self, logger):
+        """Journalise le p50/p95 de chaque étape"""
+        for stage, stats in self.summary().items():
+            logger.info(f"⏱ {stage:<16} p50={stats['p50'] * 1000:8.1f} ms  "
+                        f"p95={stats['p95'] * 1000:8.1f} ms  total={stats['total']:.1f} s  (n={stats['count']})")
+
+    def export(self, filename):
+        """Exporte le résumé et les durées par vidéo en JSON (tableaux de bord, profileurs)"""
+        with open(filename, 'w', encoding='utf-8') as f:
+            json.dump({'stages': self.summary(), 'videos': self.videos}, f, indent=2, ensure_ascii=False)
@@ -0,0 +1,38 @@
+"""
+Fixtures communes : accès aux modules du dépôt et clips vidéo synthétiques
+"""
+
+import os
+import sys
+
+import cv2
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+def write_clip(path, frame_count=50, size=(320, 240), fps=25, square=None, background=None, active=None):
+    """Écrit un clip MJPEG/AVI ; square=(côté, pas) fait traverser un carré sombre
+
+    active=(début, fin) : indices des frames où le carré est présent (toutes par défaut).
+    """
+    width, height = size
+    writer = cv2.VideoWriter(str(path), cv2.VideoWriter_fourcc(*"MJPG"), fps, size)
+    base = background if background is not None else np.full((height, width, 3), 180, np.uint8)
+    for i in range(frame_count):
+        frame = base.copy()
+        if square is not None and (active is None or active[0] <= i < active[1]):
+            side, step = square
+            x = (i * step) % max(1, width - side)
+            y = (height - side) // 2
+            frame[y:y + side, x:x + side] = 40
+        writer.write(frame)
+    writer.release()
+    return path
+
+@pytest.fixture
+def make_clip(tmp_path):
+    """Fabrique de clips dans le dossier temporaire du test"""
+    def make(name="clip.avi", **kwargs):
+        return write_clip(tmp_path / name, **kwargs)
+    return make
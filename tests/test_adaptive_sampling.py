@@ -0,0 +1,38 @@
+"""
+Échantillonnage adaptatif : seuil relatif au bruit du clip, repli uniforme
+"""
+
+import pytest
+
+from video_analyzer import VideoAnalyzer
+from video_session import VideoSession, compute_frame_indices
+
+def small_animal_clip(make_clip):
+    # 20 s de fond fixe ; un carré de 8 px traverse l'image entre 8 s et 12 s
+    return make_clip("small.avi", frame_count=500, size=(160, 120), square=(8, 1), active=(200, 300))
+
+@pytest.mark.parametrize("backend", ["opencv", "pyav"])
+def test_small_moving_object_is_sampled(make_clip, backend):
+    if backend == "pyav":
+        pytest.importorskip("av")
+    clip = small_animal_clip(make_clip)
+    with VideoSession(clip) as session:
+        indexed_frames = session.sample_frames_motion(backend=backend)
+
+    # Bien en dessous de l'ancien seuil absolu (2.0), pourtant retenu
+    assert 0 < session.motion_peak < 2.0
+    assert indexed_frames
+    assert all(150 <= frame_idx <= 300 for frame_idx, _ in indexed_frames)
+
+def test_static_clip_falls_back_to_uniform_frames(make_clip):
+    clip = make_clip("static.avi", frame_count=500, size=(160, 120))
+    with VideoSession(clip) as session:
+        indexed_frames = session.sample_frames_motion(backend="opencv", fallback_frames=10)
+
+    assert [frame_idx for frame_idx, _ in indexed_frames] == compute_frame_indices(500, 10)
+
+def test_adaptive_analysis_never_reports_empty_clip(make_clip):
+    clip = make_clip("static.avi", frame_count=500, size=(160, 120))
+    result = VideoAnalyzer(sampling="adaptive", keyframe_backend="opencv").analyze_video(clip)
+
+    assert result['sampled_frames'] == 10
@@ -0,0 +1,40 @@
+"""
+Cache des analyses : vidéos supprimées ou déplacées pendant une exécution
+"""
+
+import os
+
+from analysis_cache import AnalysisCache
+from video_analyzer import VideoAnalyzer
+
+def test_missing_video_is_a_cache_miss(tmp_path, make_clip):
+    clip = make_clip("a.avi", frame_count=10)
+    cache = AnalysisCache(str(tmp_path / "cache.json"))
+    cache.put(clip, {'detector': 'fast'}, {'detection_count': 0})
+    os.remove(clip)
+
+    assert cache.get(clip, {'detector': 'fast'}) is None
+    cache.put(clip, {'detector': 'fast'}, {'detection_count': 1})
+    assert cache.entries[os.path.abspath(clip)]['result'] == {'detection_count': 0}
+
+def run_deleting_second_video(tmp_path, make_clip, **options):
+    clips = [make_clip(f"{name}.avi", square=(60, 8)) for name in "abc"]
+    cache = AnalysisCache(str(tmp_path / "cache.json"))
+    analyzer = VideoAnalyzer(cache=cache, **options)
+    # b.avi en cache : sa validation (os.stat) a lieu après sa suppression
+    list(analyzer.iter_directory_results([clips[1]]))
+
+    filenames = []
+    for result in analyzer.iter_directory_results(iter(clips)):
+        filenames.append(result['filename'])
+        if len(filenames) == 1 and os.path.exists(clips[1]):
+            os.remove(clips[1])
+    return filenames
+
+def test_video_deleted_mid_run_sequential(tmp_path, make_clip):
+    assert run_deleting_second_video(tmp_path, make_clip) == ["a.avi", "c.avi"]
+
+def test_video_deleted_mid_run_pipeline(tmp_path, make_clip):
+    # Le parcours continue après la vidéo disparue (c.avi est analysée)
+    filenames = run_deleting_second_video(tmp_path, make_clip, pipeline=True, queue_depth=1)
+    assert filenames[0] == "a.avi" and filenames[-1] == "c.avi"
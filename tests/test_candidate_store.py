@@ -0,0 +1,35 @@
+"""
+Stockage des candidats : mesures de forme conservées pour le reseuillage hors ligne
+"""
+
+import numpy as np
+
+from candidate_store import CandidateStore
+from video_analyzer import VideoAnalyzer
+
+def analyze_with_candidates(tmp_path, clip):
+    store_file = str(tmp_path / "candidates.npz")
+    analyzer = VideoAnalyzer(candidates_file=store_file)
+    results = list(analyzer.iter_directory_results([clip]))
+    return store_file, results
+
+def test_shape_fields_are_stored_not_returned(tmp_path, make_clip):
+    clip = make_clip("a.avi", square=(80, 6))
+    store_file, results = analyze_with_candidates(tmp_path, clip)
+
+    table, _, _ = CandidateStore.load(store_file)
+    assert len(table)
+    assert np.all(table['contour_area'] >= 500)
+    assert np.all((table['extent'] > 0) & (table['extent'] <= 1.5))
+    for detection in results[0]['detections']:
+        assert 'contour_area' not in detection and 'extent' not in detection
+
+def test_rethreshold_matches_direct_run_and_filters_shape(tmp_path, make_clip):
+    clip = make_clip("a.avi", square=(80, 6))
+    store_file, _ = analyze_with_candidates(tmp_path, clip)
+    direct = list(VideoAnalyzer().iter_directory_results([clip]))
+
+    assert CandidateStore.results_at(store_file, 0.5)[0]['detections'] == direct[0]['detections']
+    table, _, _ = CandidateStore.load(store_file)
+    too_large = float(table['contour_area'].max()) + 1
+    assert CandidateStore.results_at(store_file, 0.0, min_contour_area=too_large)[0]['detection_count'] == 0
@@ -0,0 +1,36 @@
+"""
+Mode images clés : nombre d'images plafonné et réparti sur le clip
+"""
+
+import pytest
+
+from video_analyzer import VideoAnalyzer
+from video_session import VideoSession
+
+def test_pyav_keyframes_are_capped_and_spread(make_clip):
+    pytest.importorskip("av")
+    # MJPEG : chaque frame est une image clé (50 images clés sur 2 s)
+    clip = make_clip("a.avi", frame_count=50)
+    with VideoSession(clip) as session:
+        assert len(list(session.iter_keyframes("pyav"))) == 50
+        times = [t for t, _ in session.iter_keyframes("pyav", max_frames=10)]
+
+    assert len(times) == 10
+    assert times == sorted(times)
+    assert times[0] == 0.0 and times[-1] >= 1.4
+
+def test_seek_keyframes_are_capped(make_clip):
+    # 20 s à 25 fps : 10 positions toutes les 2 s, plafonnées à 4
+    clip = make_clip("a.avi", frame_count=500, size=(160, 120))
+    with VideoSession(clip) as session:
+        assert len(list(session.iter_keyframes("opencv"))) == 10
+        times = [t for t, _ in session.iter_keyframes("opencv", max_frames=4)]
+
+    assert times == pytest.approx([0.0, 4.0, 8.0, 12.0])
+
+def test_analyzer_keyframes_use_frame_budget(make_clip):
+    pytest.importorskip("av")
+    clip = make_clip("a.avi", frame_count=50)
+    analyzer = VideoAnalyzer(sampling="keyframes", keyframe_backend="pyav")
+    with VideoSession(clip) as session:
+        assert len(list(analyzer.iter_timed_frames(session))) == analyzer.max_frames
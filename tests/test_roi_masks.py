@@ -0,0 +1,55 @@
+"""
+Masques ROI non rectangulaires : pas de contour parasite le long du masque
+"""
+
+import numpy as np
+
+from mlx_detector import FastMLXDetector
+from roi_masks import RoiMask
+
+WIDTH, HEIGHT = 320, 240
+# Triangle ignoré à gauche : la zone analysée n'est pas rectangulaire
+TRIANGLE = [[[0, 0], [0.55, 0], [0, 1]]]
+
+def background():
+    """Fond lisse et non uniforme (dégradé horizontal, ondulation verticale)"""
+    yy, xx = np.mgrid[0:HEIGHT, 0:WIDTH]
+    gray = 150 + 40 * xx / WIDTH + 20 * np.sin(yy / 30)
+    return np.repeat(gray[..., None], 3, axis=2).astype(np.uint8)
+
+def detect(mask, frame):
+    detector = FastMLXDetector()
+    return mask.to_frame(detector.quick_detect_batch([mask.apply(frame)], confidence_threshold=0.3)[0])
+
+def test_masked_pixels_keep_frame_and_are_neutral():
+    mask = RoiMask.from_polygons(TRIANGLE, WIDTH, HEIGHT)
+    frame = background()
+    cropped = mask.apply(frame)
+
+    x, y, w, h = mask.box
+    kept = mask.crop_keep > 0
+    assert not mask.rectangular
+    assert np.array_equal(cropped[kept], frame[y:y + h, x:x + w][kept])
+    # Pas de saut d'intensité au bord du masque (une mise à zéro en crée un de ~170)
+    assert np.abs(np.diff(cropped.astype(int), axis=1)).max() < 20
+
+def test_no_detection_on_mask_border():
+    mask = RoiMask.from_polygons(TRIANGLE, WIDTH, HEIGHT)
+    assert detect(mask, background()) == []
+
+def test_animal_inside_roi_still_detected():
+    mask = RoiMask.from_polygons(TRIANGLE, WIDTH, HEIGHT)
+    frame = background()
+    frame[40:110, 200:270] = 40
+    detections = detect(mask, frame)
+
+    assert [d['bbox'] for d in detections] == [[198, 39, 270, 110]]
+
+def test_box_straddling_mask_is_dropped():
+    mask = RoiMask.from_polygons(TRIANGLE, WIDTH, HEIGHT)
+    x = mask.box[0]
+    # Centre dans la zone analysée, mais boîte à moitié sur le triangle masqué
+    straddling = {'bbox': [1 - x, 0, 178 - x, 239]}
+    inside = {'bbox': [200 - x, 40, 270 - x, 110]}
+
+    assert mask.to_frame([straddling, inside]) == [inside]
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Détection par tuiles pour les vidéos haute résolution (4K)
+Découpe chaque frame en tuiles qui se chevauchent, les passe au détecteur en
+parallèle et fusionne les boîtes par NMS dans les coordonnées d'origine
+"""
+
+import os
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from detectors import run_detector
+
+logger = logging.getLogger(__name__)
+
+def tile_boxes(width, height, grid=(2, 2), overlap=0.1):
+    """Rectangles (x1, y1, x2, y2) d'une grille colonnes x lignes de tuiles
+
+    Chaque tuile déborde sur ses voisines de overlap fois sa taille, pour
+    qu'un animal coupé par une frontière soit entier dans une des tuiles.
+    """
+    columns, rows = grid
+    tile_w, tile_h = width / columns, height / rows
+    pad_x, pad_y = int(tile_w * overlap), int(tile_h * overlap)
+    boxes = []
+    for row in range(rows):
+        for column in range(columns):
+            x1, y1 = int(column * tile_w), int(row * tile_h)
+            x2, y2 = int((column + 1) * tile_w), int((row + 1) * tile_h)
+            boxes.append((max(0, x1 - pad_x), max(0, y1 - pad_y),
+                          min(width, x2 + pad_x), min(height, y2 + pad_y)))
+    return boxes
+
+def merge_detections(detections, nms_threshold=0.5):
+    """Fusionne les détections redondantes (tuiles voisines) par NMS par classe"""
+    import cv2
+
+    if len(detections) < 2:
+        return detections
+    class_ids = {}
+    boxes = [[d['bbox'][0], d['bbox'][1], d['bbox'][2] - d['bbox'][0], d['bbox'][3] - d['bbox'][1]]
+             for d in detections]
+    scores = [d['confidence'] for d in detections]
+    labels = [class_ids.setdefault(d['class'], len(class_ids)) for d in detections]
+    keep = cv2.dnn.NMSBoxesBatched(boxes, scores, labels, 0.0, nms_threshold)
+    return [detections[i] for i in sorted(int(i) for i in keep)]
+
+class TiledDetector:
+    def __init__(self, detector, grid=(2, 2), overlap=0.1, threads=None, full_frame=True, nms_threshold=0.5):
+        """Enveloppe un détecteur pour l'appliquer tuile par tuile
+
+        grid : (colonnes, lignes) de tuiles. full_frame ajoute une passe sur
+        la frame entière pour les grands animaux qui débordent des tuiles.
+        threads : threads de détection (par défaut un par tuile, dans la
+        limite des cœurs) ; OpenCV libère le GIL pendant les calculs.
+        """
+        self.detector = detector
+        self.grid = grid
+        self.overlap = overlap
+        self.full_frame = full_frame
+        self.nms_threshold = nms_threshold
+        self.threads = threads or min(grid[0] * grid[1], os.cpu_count() or 1)
+        self.executor = ThreadPoolExecutor(max_workers=self.threads) if self.threads > 1 else None
+        logger.info(f"Détection par tuiles {grid[0]}x{grid[1]} (chevauchement {overlap:.0%}, "
+                    f"{self.threads} threads)")
+
+    def _detect_tiles(self, tiles, confidence_threshold):
+        """Détecte sur une liste de tuiles, réparties entre les threads"""
+        if self.executor is None:
+            return run_detector(self.detector, tiles, confidence_threshold)
+        chunk_size = -(-len(tiles) // self.threads)
+        chunks = [tiles[start:start + chunk_size] for start in range(0, len(tiles), chunk_size)]
+        futures = [self.executor.submit(run_detector, self.detector, chunk, confidence_threshold)
+                   for chunk in chunks]
+        return [detections for future in futures for detections in future.result()]
+
+    def detect_batch(self, images, confidence_threshold=0.5):
+        """Détecte les objets dans un lot d'images, tuiles de toutes les frames ensemble"""
+        origins = []
+        tiles = []
+        for i, image in enumerate(images):
+            height, width = image.shape[:2]
+            for x1, y1, x2, y2 in tile_boxes(width, height, self.grid, self.overlap):
+                origins.append((i, x1, y1))
+                tiles.append(image[y1:y2, x1:x2])
+            if self.full_frame:
+                origins.append((i, 0, 0))
+                tiles.append(image)
+
+        all_detections = [[] for _ in images]
+        for (i, x, y), detections in zip(origins, self._detect_tiles(tiles, confidence_threshold)):
+            for detection in detections:
+                x1, y1, x2, y2 = detection['bbox']
+                detection['bbox'] = [x1 + x, y1 + y, x2 + x, y2 + y]
+                all_detections[i].append(detection)
+        return [merge_detections(detections, self.nms_threshold) for detections in all_detections]
+
+    def quick_detect(self, image, confidence_threshold=0.5):
+        """Détection sur une seule image (même interface que FastMLXDetector)"""
+        return self.detect_batch([image], confidence_threshold)[0]
+
+    def close(self):
+        """Arrête le pool de threads"""
+        if self.executor is not None:
+            self.executor.shutdown()
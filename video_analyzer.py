@@ -4,136 +4,884 @@ Analyseur de vidéos de piège photo avec IA
 Détecte automatiquement les animaux et génère des rapports
 """
 
-import cv2
 import os
 import json
 import datetime
-from pathlib import Path
-import numpy as np
-from PIL import Image
+import time
+import threading
 import logging
-from mlx_detector import create_detector
+from detectors import create_detector, run_detector, DETECTOR_REGISTRY
+from analysis_cache import AnalysisCache
+from results_io import JsonlResultWriter
+from stage_timer import StageTimer, TimingStats
+from event_tracker import track_detections, event_max_gap
+from candidate_store import CandidateStore, to_candidates, strip_shape_fields
+from roi_masks import RoiMaskConfig
+from frame_cache import FrameCache, CachedFrames
+from video_discovery import iter_video_files
+
+# OpenCV (via video_session) et le pool de processus sont importés à la
+# demande : --help et les autres chemins sans décodage démarrent vite
 
 # Configuration du logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+# Analyseur propre à chaque processus du pool (construit une seule fois)
+_worker_analyzer = None
+
+def _init_worker(settings):
+    """Initialise l'analyseur d'un processus de travail"""
+    global _worker_analyzer
+    _worker_analyzer = VideoAnalyzer(**settings)
+
+def _analyze_in_worker(video_path):
+    """Analyse une vidéo dans un processus de travail
+
+    Les erreurs sont renvoyées plutôt que levées pour qu'un fichier
+    défectueux n'interrompe pas le lot.
+    """
+    try:
+        return _worker_analyzer.analyze_video(video_path), None
+    except Exception as e:
+        return None, str(e)
+
+def _queue_worker(settings, db_file, lease_seconds, max_attempts, worker_id):
+    """Processus de travail local de la file partagée (--queue avec --workers)"""
+    from work_queue import WorkQueue
+    
+    work_queue = WorkQueue(db_file, lease_seconds=lease_seconds, max_attempts=max_attempts)
+    VideoAnalyzer(**settings).process_queue(work_queue, worker_id)
+
+def result_options(options):
+    """Options de détecteur sans les réglages de performance (lots, threads)
+
+    Les options imbriquées (détecteurs d'une cascade) sont filtrées aussi.
+    """
+    return {k: result_options(v) if isinstance(v, dict) else v for k, v in options.items()
+            if k not in ('batch_size', 'intra_op_threads')}
+
+def resolve_keyframe_backend(backend):
+    """Décodeur effectif des images clés : "auto" devient "pyav" si PyAV s'importe, sinon "opencv"
+
+    Les deux décodeurs ne renvoient pas les mêmes frames : les clés de cache
+    portent le décodeur effectif (installer PyAV invalide les entrées "auto").
+    """
+    if backend != "auto":
+        return backend
+    import importlib
+    try:
+        importlib.import_module("av")
+    except ImportError:
+        return "opencv"
+    return "pyav"
+
+def scale_box(box, decode_scale):
+    """Ramène une boîte de frame réduite à la résolution d'origine"""
+    return [int(round(v / decode_scale)) for v in box]
+
+def iter_batches(items, batch_size):
+    """Regroupe les éléments d'un itérable en listes de batch_size au plus"""
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+class VideoJob:
+    def __init__(self, video_path):
+        """État de l'analyse d'une vidéo, partagé entre décodage et détection"""
+        self.video_path = video_path
+        self.timer = StageTimer()
+        self.lock = threading.Lock()
+        self.session = None
+        self.metadata = None
+        self.roi_mask = None
+        self.motion_score = None
+        self.skipped = False
+        self.separate_probes = False
+        self.probe_frames = None
+        self.probes = None
+        self.record_frames = False
+        self.recorded = []
+        self.detections = []
+        self.sampled_frames = 0
+        # Suivi en mode pipeline : position, erreur, lots en attente de détection
+        self.index = None
+        self.error = None
+        self.pending = 0
+        self.decoded = False
+
 class VideoAnalyzer:
-    def __init__(self, detector_type="fast"):
-        """Initialise l'analyseur avec le détecteur MLX optimisé"""
-        self.detector = create_detector(detector_type)
+    def __init__(self, detector_type="fast", sampling="auto", workers=1, cache=None, detector_options=None,
+                 adaptive_fps=0.5, motion_threshold=2.0, keyframe_backend="auto", store_timings=False,
+                 batch_size=16, detection_format="raw", roi_config=None, prefilter_threshold=None,
+                 tiles=None, tile_overlap=0.1, tile_threads=None, decode_width=None, frame_cache_dir=None,
+                 candidates_file=None, pipeline=False, decode_threads=2, detect_threads=1, queue_depth=4):
+        """Initialise l'analyseur avec le détecteur MLX optimisé
+
+        cache : AnalysisCache optionnel ; les vidéos inchangées ne sont alors
+        pas réanalysées par analyze_directory.
+        detector_options : options passées à create_detector (par ex.
+        model_path et intra_op_threads pour le détecteur "onnx").
+        sampling="adaptive" remplace les 10 frames fixes par les frames les
+        plus animées, à raison de adaptive_fps frames par seconde de vidéo ;
+        une frame est animée si son énergie de mouvement dépasse
+        motion_threshold fois l'énergie médiane du clip (sinon les 10 frames
+        uniformes sont analysées).
+        sampling="keyframes" ne décode que les images clés (tri rapide) via
+        keyframe_backend : "pyav", "opencv" ou "auto" ; le mode adaptatif
+        sonde le mouvement sur ces mêmes images clés.
+        store_timings conserve les durées par étape dans chaque résultat ;
+        elles sont de toute façon agrégées dans self.timing_stats.
+        detection_format : "raw" (une détection par frame), "events"
+        (détections regroupées en événements, format compact) ou "both"
+        (détections brutes + liste 'events').
+        roi_config : fichier JSON de masques par caméra (voir roi_masks) ;
+        les zones masquées sont exclues avant la détection.
+        prefilter_threshold : énergie de mouvement (0-255) sous laquelle un
+        clip est déclaré vide sans lancer le détecteur ; None désactive le
+        préfiltre. Le score est enregistré dans chaque résultat.
+        tiles : grille (colonnes, lignes) de détection par tuiles pour les
+        vidéos haute résolution, sur tile_threads threads.
+        decode_width : largeur maximale des frames décodées (réduction des
+        vidéos 4K quand les tuiles ne sont pas utilisées) ; les boîtes sont
+        ramenées à la résolution d'origine.
+        frame_cache_dir : dossier du cache de frames décodées ; une vidéo
+        déjà échantillonnée avec les mêmes paramètres n'est pas redécodée.
+        candidates_file : fichier .npz où conserver tous les candidats notés,
+        quel que soit le seuil (voir rethreshold.py).
+        pipeline : dans un seul processus, décode les vidéos suivantes
+        (decode_threads) pendant la détection (detect_threads), avec au plus
+        queue_depth lots de frames en attente (voir analysis_pipeline).
+        """
+        self.detector_type = detector_type
+        self.detector_options = detector_options or {}
+        self.detector = create_detector(detector_type, **self.detector_options)
+        self.tiles = tiles
+        self.tile_overlap = tile_overlap
+        self.tile_threads = tile_threads
+        if tiles:
+            from tiled_detector import TiledDetector
+            self.detector = TiledDetector(self.detector, tiles, tile_overlap, tile_threads)
+        self.decode_width = decode_width
+        self.frame_cache_dir = frame_cache_dir
+        self.frame_cache = FrameCache(frame_cache_dir) if frame_cache_dir else None
+        self.sampling = sampling
+        self.adaptive_fps = adaptive_fps
+        self.motion_threshold = motion_threshold
+        self.max_adaptive_frames = 120
+        self.keyframe_backend = keyframe_backend
+        self.store_timings = store_timings
+        self.timing_stats = TimingStats()
+        self.workers = workers
+        self.cache = cache
+        self.max_frames = 10
+        self.batch_size = batch_size
+        self.detection_format = detection_format
+        self.event_iou_threshold = 0.3
+        self.event_max_gap = 2.0
+        self.roi_config = roi_config
+        self.roi_masks = RoiMaskConfig(roi_config) if roi_config else None
+        self.prefilter_threshold = prefilter_threshold
+        self.confidence_threshold = 0.5
+        # Avec stockage des candidats, les détecteurs gardent tout candidat noté
+        self.candidates_file = candidates_file
+        self.candidate_store = CandidateStore(candidates_file) if candidates_file else None
+        self.candidate_floor = 0.0
+        self.pipeline = pipeline
+        self.decode_threads = decode_threads
+        self.detect_threads = detect_threads
+        self.queue_depth = queue_depth
         self.results = []
         logger.info(f"Analyseur initialisé avec détecteur {detector_type}")
         
-    def extract_frames(self, video_path, max_frames=10):
-        """Extrait quelques frames représentatives de la vidéo"""
-        cap = cv2.VideoCapture(video_path)
-        frames = []
-        frame_count = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
-        
-        # Prendre des frames espacées dans la vidéo
-        if frame_count > max_frames:
-            step = frame_count // max_frames
-            frame_indices = [i * step for i in range(max_frames)]
+    def extract_frames(self, video_path, max_frames=10, keyframe_interval=None):
+        """Extrait quelques frames représentatives de la vidéo
+
+        Le mode d'accès dépend de self.sampling : "sequential" (grab/retrieve
+        en une passe), "seek" (positionnement par frame) ou "auto" (choix
+        selon l'écart entre frames et l'espacement des images clés).
+        """
+        from video_session import VideoSession
+        with VideoSession(video_path) as session:
+            return session.sample_frames(max_frames, self.sampling, keyframe_interval)
+    
+    def iter_timed_frames(self, session, frames=None):
+        """Produit les couples (temps en secondes, frame) à analyser selon self.sampling
+
+        frames : frames uniformes déjà décodées (sondes du préfiltre),
+        réutilisées en échantillonnage uniforme au lieu d'être relues.
+        """
+        if isinstance(session, CachedFrames):
+            # Frames déjà échantillonnées, relues depuis le cache de frames
+            yield from session.timed_frames
+        elif self.sampling == "adaptive":
+            indexed_frames = session.sample_frames_motion(self.adaptive_fps, self.max_adaptive_frames,
+                                                          self.motion_threshold, fallback_frames=self.max_frames,
+                                                          backend=self.keyframe_backend)
+            for frame_idx, frame in indexed_frames:
+                yield (frame_idx / session.fps if session.fps else 0.0), frame
+        elif self.sampling == "keyframes":
+            # Images clés uniquement (au plus max_frames, réparties sur le clip),
+            # datées par leur horodatage de présentation
+            yield from session.iter_keyframes(self.keyframe_backend, self.max_frames)
         else:
-            frame_indices = list(range(frame_count))
-            
-        for frame_idx in frame_indices:
-            cap.set(cv2.CAP_PROP_POS_FRAMES, frame_idx)
-            ret, frame = cap.read()
-            if ret:
-                frames.append(frame)
-                
-        cap.release()
-        return frames
+            if frames is None:
+                frames = session.sample_frames(self.max_frames, self.sampling)
+            for i, frame in enumerate(frames):
+                yield (i * session.duration) / len(frames), frame
+    
+    def prefilter(self, session, roi_mask=None):
+        """Sonde le clip avant détection : (score de mouvement, frames sondées)
+
+        Les max_frames frames uniformes sont réduites en 64x36 niveaux de
+        gris (après masque ROI, pour ignorer le bandeau d'horodatage) ; le
+        score est l'énergie de mouvement maximale entre sondes successives.
+        """
+        from video_session import motion_energy
+        
+        strategy = self.sampling if self.sampling in ("sequential", "seek") else "auto"
+        frames = session.sample_frames(self.max_frames, strategy)
+        probes = [roi_mask.apply(frame) for frame in frames] if roi_mask is not None else frames
+        return round(motion_energy(probes), 3), frames
+    
+    def detect_frames(self, frames):
+        """Lance le détecteur sur une liste de frames, une liste de détections par frame"""
+        threshold = self.confidence_threshold if self.candidate_store is None else self.candidate_floor
+        return run_detector(self.detector, frames, threshold)
     
     def analyze_video(self, video_path):
         """Analyse une vidéo et retourne les détections"""
+        job = self.start_video(video_path)
+        try:
+            for batch in self.iter_job_batches(job):
+                self.detect_job_batch(job, batch)
+        finally:
+            job.session.close()
+        return self.finish_video(job)
+    
+    def start_video(self, video_path):
+        """Ouvre une vidéo (ou ses frames en cache) et lance le préfiltre
+
+        Étape de décodage : retourne le VideoJob dont iter_job_batches
+        produira les lots de frames.
+        """
         logger.info(f"Analyse de {video_path}")
         
-        # Extraire les métadonnées de la vidéo
-        cap = cv2.VideoCapture(video_path)
-        fps = cap.get(cv2.CAP_PROP_FPS)
-        duration = cap.get(cv2.CAP_PROP_FRAME_COUNT) / fps
-        cap.release()
+        from video_session import VideoSession
+        job = VideoJob(video_path)
+        timer = job.timer
         
-        # Extraire quelques frames pour l'analyse
-        frames = self.extract_frames(video_path)
+        # Frames déjà décodées par une exécution précédente
+        job.separate_probes = self.prefilter_threshold is not None and self.sampling in ("adaptive", "keyframes")
+        if self.frame_cache is not None:
+            with timer.stage('frame_cache'):
+                job.session = self.frame_cache.load(video_path, self.frame_cache_params(), job.separate_probes)
+        job.record_frames = self.frame_cache is not None and job.session is None
         
-        detections = []
-        for i, frame in enumerate(frames):
-            # Détection avec MLX
-            frame_detections = self.detector.quick_detect(frame, confidence_threshold=0.5)
+        # Sinon ouvrir la vidéo une seule fois pour les métadonnées et les frames
+        if job.session is None:
+            with timer.stage('open'):
+                job.session = VideoSession(video_path, max_width=self.decode_width)
+        session = job.session
+        try:
+            with timer.stage('metadata'):
+                job.metadata = session.metadata()
+            if self.roi_masks is not None:
+                job.roi_mask = self.roi_masks.mask_for(video_path, session.frame_width, session.frame_height)
             
+            if self.prefilter_threshold is not None:
+                with timer.stage('prefilter'):
+                    job.motion_score, job.probe_frames = self.prefilter(session, job.roi_mask)
+                if job.separate_probes:
+                    job.probe_frames, job.probes = None, job.probe_frames
+                job.skipped = job.motion_score < self.prefilter_threshold
+        except Exception:
+            session.close()
+            raise
+        return job
+    
+    def iter_job_batches(self, job):
+        """Produit les lots de (temps, frame) à analyser d'un VideoJob (étape de décodage)"""
+        if job.skipped:
+            return
+        timed_frames = job.timer.timed_iter('extract', self.iter_timed_frames(job.session, job.probe_frames))
+        for batch in iter_batches(timed_frames, self.batch_size):
+            if job.record_frames:
+                job.recorded.extend(batch)
+            yield batch
+    
+    def detect_job_batch(self, job, batch):
+        """Détecte les objets d'un lot de frames et les ajoute au VideoJob (étape de détection)
+
+        Peut être appelé depuis plusieurs threads pour un même job.
+        """
+        start = time.perf_counter()
+        # Détection avec MLX, par lot de frames
+        frames = [frame for _, frame in batch]
+        if job.roi_mask is not None:
+            frames = [job.roi_mask.apply(frame) for frame in frames]
+        batch_detections = self.detect_frames(frames)
+        if job.roi_mask is not None:
+            batch_detections = [job.roi_mask.to_frame(d) for d in batch_detections]
+        if job.session.decode_scale != 1.0:
+            for frame_detections in batch_detections:
+                for detection in frame_detections:
+                    detection['bbox'] = scale_box(detection['bbox'], job.session.decode_scale)
+        
+        detections = []
+        for (frame_time, _), frame_detections in zip(batch, batch_detections):
             for detection in frame_detections:
-                detection['frame_time'] = (i * duration) / len(frames)
+                detection['frame_time'] = frame_time
                 detections.append(detection)
+        with job.lock:
+            job.timer.add('detect', time.perf_counter() - start)
+            job.sampled_frames += len(batch)
+            job.detections.extend(detections)
+    
+    def finish_video(self, job):
+        """Assemble le résultat d'un VideoJob dont tous les lots ont été détectés"""
+        session = job.session
+        metadata = job.metadata
+        timer = job.timer
+        duration = metadata['duration']
+        sampled_frames = job.sampled_frames
+        skipped = job.skipped
+        motion_score = job.motion_score
+        # Lots détectés dans le désordre en mode pipeline : remettre l'ordre des frames
+        detections = sorted(job.detections, key=lambda d: d['frame_time'])
+        motion_peak = getattr(session, 'motion_peak', None)
+        
+        # Un clip écarté par le préfiltre n'a pas de frames extraites à conserver
+        if job.record_frames and not skipped:
+            with timer.stage('frame_cache'):
+                self.frame_cache.save(job.video_path, self.frame_cache_params(), session, job.recorded,
+                                      job.probes if job.separate_probes else None)
+        
+        if sampled_frames:
+            timer.add('detect_per_frame', timer.durations['detect'] / sampled_frames)
+        candidates = None
+        if self.candidate_store is not None:
+            candidates = to_candidates(detections)
+            detections = [d for d in detections if d['confidence'] > self.confidence_threshold]
+        strip_shape_fields(detections)
+        if skipped:
+            logger.info(f"Clip vide ignoré (mouvement {motion_score} < {self.prefilter_threshold})")
+        
+        events = None
+        if self.detection_format != "raw":
+            max_gap = event_max_gap(duration, sampled_frames, self.event_max_gap)
+            events = track_detections(detections, self.event_iou_threshold, max_gap)
+            if self.detection_format == "events":
+                detections = events
         
         # Créer le résultat final
+        video_path = job.video_path
         video_result = {
             'video_path': str(video_path),
             'filename': os.path.basename(video_path),
             'duration': duration,
-            'fps': fps,
+            'fps': metadata['fps'],
+            'width': metadata['width'],
+            'height': metadata['height'],
+            'codec': metadata['codec'],
             'detections': detections,
             'detection_count': len(detections),
+            'sampled_frames': sampled_frames,
             'analyzed_at': datetime.datetime.now().isoformat()
         }
+        if motion_peak is not None:
+            video_result['motion_peak'] = motion_peak
+        if job.roi_mask is not None:
+            video_result['roi_box'] = scale_box(job.roi_mask.box, session.decode_scale)
+        if motion_score is not None:
+            video_result['motion_score'] = motion_score
+            video_result['prefilter_skipped'] = skipped
+        if self.detection_format == "events":
+            video_result['detection_format'] = "events"
+        elif self.detection_format == "both":
+            video_result['events'] = events
+            video_result['event_count'] = len(events)
+        if candidates is not None:
+            # Retirés du résultat par CandidateStore.collect
+            video_result['candidates'] = candidates
+        # Durées par étape : agrégées par analyze_directory, conservées
+        # dans le résultat seulement si store_timings
+        video_result['timings'] = timer.as_dict()
         
         return video_result
     
-    def analyze_directory(self, video_dir, output_file="analysis_results.json"):
-        """Analyse tous les fichiers vidéo d'un répertoire"""
-        video_dir = Path(video_dir)
-        video_extensions = {'.mp4', '.avi', '.mov', '.mkv', '.wmv'}
+    def analysis_params(self):
+        """Paramètres qui influencent le résultat d'une analyse (clé de cache)"""
+        params = {
+            'detector': self.detector_type,
+            'max_frames': self.max_frames,
+            'confidence_threshold': self.confidence_threshold
+        }
+        # Les options de performance (lots, threads) ne changent pas le résultat
+        detector_options = result_options(self.detector_options)
+        if detector_options:
+            params['detector_options'] = detector_options
+        if self.detection_format != "raw":
+            params['detection_format'] = self.detection_format
+        if self.roi_masks is not None:
+            params['roi'] = self.roi_masks.signature()
+        if self.prefilter_threshold is not None:
+            params['prefilter_threshold'] = self.prefilter_threshold
+        if self.candidate_store is not None:
+            # Version du format des lignes de candidats (mesures de forme ajoutées)
+            params['candidates'] = 2
+        if self.tiles:
+            params['tiles'] = list(self.tiles)
+            params['tile_overlap'] = self.tile_overlap
+        if self.decode_width:
+            params['decode_width'] = self.decode_width
+        if self.sampling == "keyframes":
+            params['sampling'] = self.sampling
+            params['keyframe_backend'] = resolve_keyframe_backend(self.keyframe_backend)
+            # Version de la sélection (images clés plafonnées à max_frames)
+            params['keyframes'] = 2
+        elif self.sampling == "adaptive":
+            params.update({
+                'sampling': self.sampling,
+                'adaptive_fps': self.adaptive_fps,
+                'motion_threshold': self.motion_threshold,
+                # Seuil relatif à l'énergie médiane, sondes sur les images clés
+                'motion_gate': 'median',
+                'keyframe_backend': resolve_keyframe_backend(self.keyframe_backend)
+            })
+        return params
+    
+    def frame_cache_params(self):
+        """Paramètres qui déterminent les frames échantillonnées (clé du cache de frames)"""
+        params = {
+            'sampling': self.sampling,
+            'max_frames': self.max_frames,
+            'decode_width': self.decode_width
+        }
+        if self.sampling == "keyframes":
+            params['keyframe_backend'] = resolve_keyframe_backend(self.keyframe_backend)
+            params['keyframes'] = 2
+        elif self.sampling == "adaptive":
+            params.update({
+                'adaptive_fps': self.adaptive_fps,
+                'motion_threshold': self.motion_threshold,
+                'max_adaptive_frames': self.max_adaptive_frames,
+                'motion_gate': 'median',
+                'keyframe_backend': resolve_keyframe_backend(self.keyframe_backend)
+            })
+        return params
+    
+    def worker_settings(self):
+        """Paramètres pour reconstruire cet analyseur dans un processus de travail"""
+        return {
+            'detector_type': self.detector_type,
+            'detector_options': self.detector_options,
+            'sampling': self.sampling,
+            'adaptive_fps': self.adaptive_fps,
+            'motion_threshold': self.motion_threshold,
+            'keyframe_backend': self.keyframe_backend,
+            'batch_size': self.batch_size,
+            'detection_format': self.detection_format,
+            'roi_config': self.roi_config,
+            'prefilter_threshold': self.prefilter_threshold,
+            'tiles': self.tiles,
+            'tile_overlap': self.tile_overlap,
+            'tile_threads': self.tile_threads,
+            'decode_width': self.decode_width,
+            'frame_cache_dir': self.frame_cache_dir,
+            'candidates_file': self.candidates_file
+        }
+    
+    def iter_analyses(self, video_files):
+        """Analyse une liste de vidéos et produit (fichier, résultat, erreur)
+
+        Avec workers > 1, les vidéos sont réparties sur un pool de processus ;
+        chaque processus construit son détecteur une seule fois. Sinon, en
+        mode pipeline, décodage et détection se recouvrent dans des threads.
+        Les résultats sont produits dans l'ordre de video_files quel que
+        soit le mode. video_files peut être un générateur (parcours d'une
+        arborescence en cours) : il est consommé au fur et à mesure.
+        """
+        if self.pipeline and self.workers <= 1:
+            from analysis_pipeline import AnalysisPipeline
+            pipeline = AnalysisPipeline(self, self.decode_threads, self.detect_threads, self.queue_depth)
+            yield from pipeline.iter_analyses(video_files)
+            return
+        if self.workers <= 1:
+            for video_file in video_files:
+                try:
+                    yield video_file, self.analyze_video(video_file), None
+                except Exception as e:
+                    yield video_file, None, str(e)
+            return
         
-        video_files = []
-        for ext in video_extensions:
-            video_files.extend(video_dir.glob(f"*{ext}"))
-            video_files.extend(video_dir.glob(f"*{ext.upper()}"))
+        from collections import deque
+        from concurrent.futures import ProcessPoolExecutor
+        from concurrent.futures.process import BrokenProcessPool
         
-        logger.info(f"Trouvé {len(video_files)} fichiers vidéo")
+        def start_pool():
+            return ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker,
+                                       initargs=(self.worker_settings(),))
+        
+        def analyze_alone(executor, video_file):
+            """Réanalyse une vidéo seule dans le pool : un nouvel arrêt la désigne coupable"""
+            try:
+                return executor, executor.submit(_analyze_in_worker, video_file).result()
+            except BrokenProcessPool as e:
+                executor.shutdown(wait=False, cancel_futures=True)
+                return start_pool(), (None, f"Processus d'analyse interrompu: {e}")
+        
+        logger.info(f"Analyse parallèle sur {self.workers} processus")
+        video_files = iter(video_files)
+        executor = start_pool()
+        # Fenêtre de vidéos soumises : le parcours n'est pas consommé d'avance
+        in_flight = deque()
+        try:
+            while True:
+                while len(in_flight) < 2 * self.workers:
+                    video_file = next(video_files, None)
+                    if video_file is None:
+                        break
+                    in_flight.append((video_file, executor.submit(_analyze_in_worker, video_file)))
+                if not in_flight:
+                    break
+                
+                video_file, future = in_flight.popleft()
+                try:
+                    outcome = future.result()
+                except BrokenProcessPool:
+                    # Un processus est mort (plantage du décodeur, OOM) : toutes les vidéos en
+                    # cours échouent. Nouveau pool, la vidéo en tête est réessayée seule puis
+                    # les autres sont soumises à nouveau
+                    logger.warning(f"Pool de processus interrompu pendant {video_file}, redémarrage")
+                    executor.shutdown(wait=False, cancel_futures=True)
+                    executor, outcome = analyze_alone(start_pool(), video_file)
+                    in_flight = deque((v, executor.submit(_analyze_in_worker, v)) for v, _ in in_flight)
+                yield (video_file, *outcome)
+        finally:
+            executor.shutdown(wait=True, cancel_futures=True)
+    
+    def process_queue(self, work_queue, worker_id=None):
+        """Analyse les vidéos d'une file partagée (WorkQueue) jusqu'à ce qu'elle soit vide
+
+        Chaque vidéo est prise sous bail, renouvelé pendant son analyse ; le
+        résultat est enregistré dans la file. Quand il ne reste que des
+        vidéos sous bail d'autres processus, la boucle attend : un bail
+        expiré est repris. Avec workers > 1, autant de processus locaux
+        consomment la file. Retourne le nombre de vidéos analysées ici.
+        """
+        from work_queue import LeaseHeartbeat, default_worker_id
         
-        all_results = []
-        for video_file in video_files:
+        worker_id = worker_id or default_worker_id()
+        if self.workers > 1:
+            import multiprocessing
+            processes = [multiprocessing.Process(target=_queue_worker, name=f"queue-{i}",
+                                                 args=(self.worker_settings(), work_queue.db_file,
+                                                       work_queue.lease_seconds, work_queue.max_attempts,
+                                                       f"{worker_id}-{i}"))
+                         for i in range(self.workers)]
+            logger.info(f"File partagée : {self.workers} processus locaux")
+            for process in processes:
+                process.start()
+            for process in processes:
+                process.join()
+            return 0
+        
+        processed = 0
+        while True:
+            video_path = work_queue.claim(worker_id)
+            if video_path is None:
+                if work_queue.active_leases() == 0:
+                    break
+                time.sleep(min(work_queue.lease_seconds / 3, 10))
+                continue
+            
             try:
-                result = self.analyze_video(video_file)
-                all_results.append(result)
-                logger.info(f"✓ {video_file.name}: {result['detection_count']} détections")
+                with LeaseHeartbeat(work_queue, worker_id, video_path):
+                    result = self.analyze_video(video_path)
             except Exception as e:
-                logger.error(f"Erreur avec {video_file}: {e}")
+                logger.error(f"Erreur avec {video_path}: {e}")
+                work_queue.fail(worker_id, video_path, str(e))
+                continue
+            self.record_timings(result)
+            if work_queue.complete(worker_id, video_path, result):
+                processed += 1
+                logger.info(f"✓ {result['filename']}: {result['detection_count']} détections")
+            else:
+                logger.info(f"{result['filename']} déjà terminée par un autre processus, résultat ignoré")
+        
+        logger.info(f"{worker_id}: {processed} vidéos analysées")
+        return processed
+    
+    def find_video_files(self, video_dir, include=None, exclude=None):
+        """Liste les fichiers vidéo d'un ou plusieurs dossiers, sous-dossiers compris
+
+        Ordre et motifs include/exclude : voir video_discovery.iter_video_files.
+        """
+        video_files = list(iter_video_files(video_dir, include, exclude))
+        logger.info(f"Trouvé {len(video_files)} fichiers vidéo")
+        return video_files
+    
+    def iter_directory_results(self, video_files, on_error=None):
+        """Produit les résultats des vidéos dans l'ordre, au fil de l'analyse
+
+        Les vidéos inchangées sont reprises du cache, les autres sont
+        analysées ; une vidéo en erreur est journalisée et omise, après
+        appel de on_error(fichier, erreur) s'il est fourni (progression).
+        video_files peut être un générateur (iter_video_files) : l'analyse
+        commence avant la fin du parcours.
+        """
+        from collections import deque
+        
+        params = self.analysis_params() if self.cache is not None else None
+        # Vidéos parcourues, dans l'ordre : (fichier, résultat en cache ou None)
+        discovered = deque()
+        cached_count = 0
+        
+        def to_analyze():
+            """Vidéos à analyser ; les résultats en cache attendent leur tour dans discovered"""
+            nonlocal cached_count
+            for video_file in video_files:
+                result = self.cache.get(video_file, params) if self.cache is not None else None
+                discovered.append((video_file, result))
+                if result is None:
+                    yield video_file
+                else:
+                    cached_count += 1
+        
+        def flush_cached():
+            """Résultats en cache en tête de file (avant la prochaine vidéo analysée)"""
+            while discovered and discovered[0][1] is not None:
+                yield self.collect_candidates(discovered.popleft()[1])
+        
+        analyses = self.iter_analyses(to_analyze())
+        try:
+            for video_file, result, error in analyses:
+                yield from flush_cached()
+                discovered.popleft()
+                if error is None:
+                    self.record_timings(result)
+                    if self.cache is not None:
+                        self.cache.put(video_file, params, result)
+                    logger.info(f"✓ {video_file.name}: {result['detection_count']} détections")
+                    yield self.collect_candidates(result)
+                else:
+                    logger.error(f"Erreur avec {video_file}: {error}")
+                    if on_error is not None:
+                        on_error(video_file, error)
+            yield from flush_cached()
+            if self.cache is not None:
+                logger.info(f"{cached_count} vidéos inchangées reprises du cache")
+        finally:
+            analyses.close()
+            if self.cache is not None:
+                self.cache.save()
+            if self.candidate_store is not None:
+                self.candidate_store.save()
+    
+    def collect_candidates(self, result):
+        """Transfère les candidats d'un résultat vers le stockage des candidats"""
+        if self.candidate_store is None:
+            return result
+        return self.candidate_store.collect(result)
+    
+    def record_timings(self, result):
+        """Ajoute les durées d'une vidéo aux statistiques de l'exécution"""
+        timings = result['timings'] if self.store_timings else result.pop('timings', None)
+        if timings:
+            self.timing_stats.add_video(result['filename'], timings)
+    
+    def analyze_directory(self, video_dir, output_file="analysis_results.json", include=None, exclude=None):
+        """Analyse tous les fichiers vidéo d'un ou plusieurs dossiers (sous-dossiers compris)"""
+        video_files = iter_video_files(video_dir, include, exclude)
+        all_results = list(self.iter_directory_results(video_files))
         
         # Sauvegarder les résultats
+        start = time.perf_counter()
         with open(output_file, 'w', encoding='utf-8') as f:
             json.dump(all_results, f, indent=2, ensure_ascii=False)
+        self.timing_stats.add('write', time.perf_counter() - start)
         
         logger.info(f"Résultats sauvegardés dans {output_file}")
+        self.timing_stats.log_summary(logger)
         return all_results
+    
+    def stream_directory(self, video_dir, output_file="analysis_results.jsonl", include=None, exclude=None):
+        """Analyse un répertoire en écrivant une ligne JSON par vidéo terminée
+
+        Les résultats ne sont pas conservés en mémoire et chaque ligne est
+        écrite sur disque dès la fin de l'analyse de sa vidéo.
+        """
+        video_files = iter_video_files(video_dir, include, exclude)
+        with JsonlResultWriter(output_file) as writer:
+            for result in self.iter_directory_results(video_files):
+                start = time.perf_counter()
+                writer.write(result)
+                self.timing_stats.add('write', time.perf_counter() - start)
+        
+        logger.info(f"Résultats sauvegardés dans {output_file}")
+        self.timing_stats.log_summary(logger)
+        return {'video_count': writer.video_count, 'detection_count': writer.detection_count}
 
 def main():
     """Fonction principale"""
     import argparse
     
     parser = argparse.ArgumentParser(description="Analyseur de vidéos de piège photo avec MLX")
-    parser.add_argument("video_path", help="Chemin vers le fichier vidéo ou dossier")
+    parser.add_argument("video_path", nargs="+",
+                        help="Fichier vidéo, ou un ou plusieurs dossiers (parcourus avec leurs sous-dossiers)")
+    parser.add_argument("--include", action="append",
+                        help="Motif des vidéos à analyser (nom, ou chemin relatif s'il contient '/') ; répétable")
+    parser.add_argument("--exclude", action="append",
+                        help="Motif des fichiers ou dossiers à ignorer (ex. '@eaDir', '*/corbeille/*') ; répétable")
     parser.add_argument("--output", "-o", default="analysis_results.json", help="Fichier de sortie")
-    parser.add_argument("--detector", choices=["fast", "accurate"], default="fast", help="Type de détecteur MLX")
+    parser.add_argument("--detector", choices=list(DETECTOR_REGISTRY), default="fast",
+                        help="Type de détecteur (fast/accurate : heuristiques, onnx : réseau neuronal CPU)")
+    parser.add_argument("--model", help="Modèle ONNX pour le détecteur onnx (ex. yolov8n.onnx)")
+    parser.add_argument("--model-format", choices=["yolov8", "yolov5"], default="yolov8",
+                        help="Format de sortie du modèle ONNX")
+    parser.add_argument("--threads", type=int, help="Threads d'inférence par processus (détecteur onnx)")
+    parser.add_argument("--cascade-confirm", choices=["accurate", "onnx"], default="accurate",
+                        help="Détecteur de confirmation de la cascade (--detector cascade)")
+    parser.add_argument("--cascade-threshold", type=float, default=0.3,
+                        help="Confiance minimale d'un candidat du tri rapide pour lancer la confirmation")
+    parser.add_argument("--cascade-regions", action="store_true",
+                        help="Ne confirmer que la zone des candidats plutôt que la frame entière")
+    parser.add_argument("--batch-size", type=int, default=16, help="Nombre de frames passées ensemble au détecteur")
+    parser.add_argument("--tiles", help="Détection par tuiles pour la 4K, grille colonnes x lignes (ex. 3x2)")
+    parser.add_argument("--tile-overlap", type=float, default=0.1, help="Chevauchement relatif des tuiles")
+    parser.add_argument("--tile-threads", type=int, help="Threads de détection des tuiles (défaut : un par tuile)")
+    parser.add_argument("--decode-width", type=int,
+                        help="Réduire au décodage les frames plus larges (ex. 1920 pour de la 4K sans tuiles)")
+    parser.add_argument("--sampling", choices=["auto", "sequential", "seek", "adaptive", "keyframes"],
+                        default="auto",
+                        help="Mode de lecture des frames (séquentiel grab/retrieve, seek, "
+                             "adaptatif selon le mouvement, ou images clés seulement, "
+                             "au plus 10 réparties sur le clip)")
+    parser.add_argument("--keyframe-backend", choices=["auto", "pyav", "opencv"], default="auto",
+                        help="Décodeur des images clés, modes keyframes et adaptive (PyAV si installé, sinon OpenCV)")
+    parser.add_argument("--frames-per-second", type=float, default=0.5,
+                        help="Budget de frames analysées par seconde de vidéo (mode adaptatif)")
+    parser.add_argument("--motion-threshold", type=float, default=2.0,
+                        help="Multiple de l'énergie de mouvement médiane au-delà duquel une frame "
+                             "est analysée (mode adaptatif)")
+    parser.add_argument("--workers", "-w", type=int, default=1,
+                        help="Nombre de processus d'analyse en parallèle (dossier uniquement)")
+    
+    parser.add_argument("--pipeline", action="store_true",
+                        help="Recouvrir décodage et détection dans un processus (threads et files bornées)")
+    parser.add_argument("--decode-threads", type=int, default=2, help="Threads de décodage (mode pipeline)")
+    parser.add_argument("--detect-threads", type=int, default=1, help="Threads de détection (mode pipeline)")
+    parser.add_argument("--queue-depth", type=int, default=4,
+                        help="Lots de frames décodés en attente au plus (mode pipeline, borne la mémoire)")
+    
+    parser.add_argument("--queue",
+                        help="File de travail partagée (base SQLite sur un stockage commun) : plusieurs "
+                             "processus ou machines lancent la même commande et se répartissent les vidéos")
+    parser.add_argument("--lease", type=float, default=300.0,
+                        help="Durée d'un bail de la file (secondes) ; une vidéo non renouvelée est redistribuée")
+    parser.add_argument("--worker-id", help="Identifiant du processus dans la file (défaut : machine-pid)")
+    
+    parser.add_argument("--cache", help="Fichier de cache des analyses (réanalyse seulement les nouvelles vidéos)")
+    parser.add_argument("--frame-cache", help="Dossier du cache des frames décodées (réanalyse sans redécoder)")
+    parser.add_argument("--hash", action="store_true",
+                        help="Valider le cache par empreinte SHA-256 si la date du fichier a changé")
+    
+    parser.add_argument("--format", choices=["json", "jsonl"],
+                        help="Format de sortie (jsonl : une ligne par vidéo, écrite au fil de l'eau ; "
+                             "déduit de l'extension par défaut)")
+    
+    parser.add_argument("--detections", choices=["raw", "events", "both"], default="raw",
+                        help="Détections par frame (raw), regroupées en événements (events, compact) ou les deux")
+    parser.add_argument("--roi-config", help="Masques de zones par caméra (JSON) : zones ignorées par la détection")
+    parser.add_argument("--prefilter-threshold", type=float,
+                        help="Énergie de mouvement (0-255) sous laquelle un clip est déclaré vide "
+                             "sans lancer le détecteur (score enregistré dans les résultats)")
+    parser.add_argument("--candidates",
+                        help="Conserver tous les candidats notés dans ce fichier .npz (nouveau seuil via rethreshold.py)")
+    parser.add_argument("--timings", action="store_true",
+                        help="Conserver les durées par étape (ouverture, extraction, détection) dans les résultats")
+    parser.add_argument("--timings-export", help="Exporter les statistiques de durée par étape en JSON")
     
     args = parser.parse_args()
+    if args.queue and args.cache:
+        parser.error("--cache n'est pas partagé entre processus : la file (--queue) conserve déjà les résultats")
+    tiles = tuple(int(v) for v in args.tiles.lower().split('x')) if args.tiles else None
+    output_format = args.format or ("jsonl" if args.output.endswith(".jsonl") else "json")
     
-    analyzer = VideoAnalyzer(detector_type=args.detector)
+    cache = AnalysisCache(args.cache, hash_content=args.hash) if args.cache else None
+    neural_options = {'model_format': args.model_format, 'intra_op_threads': args.threads,
+                      'batch_size': args.batch_size}
+    if args.model:
+        neural_options['model_path'] = args.model
+    detector_options = {}
+    if args.detector == "onnx":
+        detector_options = neural_options
+    elif args.detector == "cascade":
+        detector_options = {
+            'confirm': args.cascade_confirm,
+            'screen_threshold': args.cascade_threshold,
+            'regions': args.cascade_regions,
+            'confirm_options': neural_options if args.cascade_confirm == "onnx" else {}
+        }
+    analyzer = VideoAnalyzer(detector_type=args.detector, sampling=args.sampling,
+                             workers=args.workers, cache=cache, detector_options=detector_options,
+                             adaptive_fps=args.frames_per_second, motion_threshold=args.motion_threshold,
+                             keyframe_backend=args.keyframe_backend, store_timings=args.timings,
+                             batch_size=args.batch_size, detection_format=args.detections,
+                             roi_config=args.roi_config, prefilter_threshold=args.prefilter_threshold,
+                             tiles=tiles, tile_overlap=args.tile_overlap, tile_threads=args.tile_threads,
+                             decode_width=args.decode_width, frame_cache_dir=args.frame_cache,
+                             candidates_file=args.candidates, pipeline=args.pipeline,
+                             decode_threads=args.decode_threads, detect_threads=args.detect_threads,
+                             queue_depth=args.queue_depth)
     
-    if os.path.isfile(args.video_path):
+    if args.queue:
+        # Analyse distribuée : ajouter les vidéos à la file, consommer, fusionner
+        from work_queue import WorkQueue, export_results
+        
+        work_queue = WorkQueue(args.queue, lease_seconds=args.lease)
+        video_files = iter_video_files(args.video_path, args.include, args.exclude)
+        logger.info(f"{work_queue.enqueue(video_files)} vidéos ajoutées à la file {args.queue}")
+        analyzer.process_queue(work_queue, args.worker_id)
+        
+        counts = work_queue.counts()
+        if counts.get('pending', 0) or counts.get('leased', 0):
+            print(f"File non terminée ({counts}) : exporter plus tard avec work_queue.py --export")
+        else:
+            count = export_results(work_queue, args.output, args.candidates)
+            print(f"Analyse terminée: {count} vidéos fusionnées dans {args.output}, "
+                  f"{counts.get('failed', 0)} en échec")
+    elif len(args.video_path) == 1 and os.path.isfile(args.video_path[0]):
         # Analyse d'un seul fichier
-        result = analyzer.analyze_video(args.video_path)
-        with open(args.output, 'w', encoding='utf-8') as f:
-            json.dump([result], f, indent=2, ensure_ascii=False)
+        result = analyzer.collect_candidates(analyzer.analyze_video(args.video_path[0]))
+        analyzer.record_timings(result)
+        if analyzer.candidate_store is not None:
+            analyzer.candidate_store.save()
+        if output_format == "jsonl":
+            with JsonlResultWriter(args.output) as writer:
+                writer.write(result)
+        else:
+            with open(args.output, 'w', encoding='utf-8') as f:
+                json.dump([result], f, indent=2, ensure_ascii=False)
         print(f"Analyse terminée: {result['detection_count']} détections")
+    elif output_format == "jsonl":
+        stats = analyzer.stream_directory(args.video_path, args.output, args.include, args.exclude)
+        print(f"Analyse terminée: {stats['video_count']} vidéos, {stats['detection_count']} détections au total")
     else:
         # Analyse d'un dossier
-        results = analyzer.analyze_directory(args.video_path, args.output)
+        results = analyzer.analyze_directory(args.video_path, args.output, args.include, args.exclude)
         total_detections = sum(r['detection_count'] for r in results)
         print(f"Analyse terminée: {len(results)} vidéos, {total_detections} détections au total")
+    
+    if args.timings_export:
+        analyzer.timing_stats.export(args.timings_export)
+        print(f"Durées par étape exportées dans {args.timings_export}")
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
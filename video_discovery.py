@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Recherche des fichiers vidéo
+Un seul parcours os.scandir, récursif et sur plusieurs racines, produit les
+vidéos au fil de l'eau : l'analyse démarre avant la fin du parcours des
+grandes arborescences (cartes SD site/date/DCIM/100MEDIA)
+"""
+
+import os
+import logging
+from fnmatch import fnmatchcase
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+# Extensions des fichiers vidéo analysés (minuscules, comparées sans casse)
+VIDEO_EXTENSIONS = {'.mp4', '.avi', '.mov', '.mkv', '.wmv'}
+
+def matches(relative_path, patterns):
+    """Vrai si le chemin relatif (séparateurs '/') correspond à un motif
+
+    Un motif sans '/' porte sur le seul nom (ex. "*.tmp.mp4", "@eaDir"),
+    sinon sur le chemin depuis la racine (ex. "*/DCIM/*", "site1/*").
+    """
+    name = relative_path.rsplit('/', 1)[-1]
+    return any(fnmatchcase(relative_path if '/' in pattern else name, pattern) for pattern in patterns)
+
+def iter_video_files(roots, include=None, exclude=None, recursive=True, extensions=VIDEO_EXTENSIONS):
+    """Produit les vidéos sous une ou plusieurs racines, dans un ordre stable
+
+    roots : dossier, fichier ou liste de dossiers/fichiers. Ordre : racines
+    dans l'ordre donné, puis dans chaque dossier ses fichiers triés par nom
+    avant ses sous-dossiers triés par nom. Les extensions sont comparées
+    sans tenir compte de la casse (.MP4, .Mp4). include : motifs qu'une
+    vidéo doit vérifier (l'un d'eux) ; exclude : motifs écartant fichiers et
+    dossiers (un dossier exclu n'est pas parcouru). Les liens symboliques
+    vers des dossiers ne sont pas suivis ; une vidéo atteinte par deux
+    racines n'est produite qu'une fois.
+    """
+    if isinstance(roots, (str, os.PathLike)):
+        roots = [roots]
+    include = list(include or ())
+    exclude = list(exclude or ())
+    seen = set()
+
+    def accept(path, relative_path):
+        if os.path.splitext(path)[1].lower() not in extensions:
+            return False
+        if include and not matches(relative_path, include):
+            return False
+        if exclude and matches(relative_path, exclude):
+            return False
+        real_path = os.path.realpath(path)
+        if real_path in seen:
+            return False
+        seen.add(real_path)
+        return True
+
+    for root in roots:
+        root = os.fspath(root)
+        if os.path.isfile(root):
+            if accept(root, os.path.basename(root)):
+                yield Path(root)
+            continue
+        if not os.path.isdir(root):
+            logger.warning(f"Dossier introuvable: {root}")
+            continue
+
+        # Pile de (dossier, chemin relatif) : parcours en profondeur sans récursion
+        stack = [(root, "")]
+        while stack:
+            directory, relative_dir = stack.pop()
+            try:
+                with os.scandir(directory) as it:
+                    entries = sorted(it, key=lambda entry: entry.name)
+            except OSError as e:
+                logger.warning(f"Dossier illisible ignoré: {directory} ({e})")
+                continue
+
+            subdirs = []
+            for entry in entries:
+                relative_path = f"{relative_dir}{entry.name}"
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        if recursive and not (exclude and matches(relative_path, exclude)):
+                            subdirs.append((entry.path, f"{relative_path}/"))
+                    elif entry.is_file() and accept(entry.path, relative_path):
+                        yield Path(entry.path)
+                except OSError as e:
+                    logger.warning(f"Entrée illisible ignorée: {entry.path} ({e})")
+            stack.extend(reversed(subdirs))
@@ -0,0 +1,317 @@
+#!/usr/bin/env python3
+"""
+Session de décodage vidéo
+Ouvre une vidéo une seule fois et expose ses métadonnées et l'échantillonnage des frames
+"""
+
+import cv2
+import math
+import heapq
+import logging
+import statistics
+
+logger = logging.getLogger(__name__)
+
+# Écart entre images clés supposé quand le conteneur ne l'indique pas
+# (les pièges photo H.264 encodent en général une image clé toutes les ~2 s)
+DEFAULT_KEYFRAME_SECONDS = 2.0
+
+def compute_frame_indices(frame_count, max_frames=10):
+    """Calcule les indices des frames espacées à échantillonner"""
+    if frame_count > max_frames:
+        step = frame_count // max_frames
+        return [i * step for i in range(max_frames)]
+    return list(range(frame_count))
+
+def choose_sampling_strategy(frame_indices, keyframe_interval):
+    """Choisit entre lecture séquentielle et positionnement (seek)
+
+    Un seek oblige le décodeur à repartir de l'image clé précédente : en
+    moyenne la moitié d'un GOP est décodée pour chaque frame. Une lecture
+    séquentielle décode tout l'écart entre deux frames ciblées avec grab().
+    On lit séquentiellement tant que l'écart reste inférieur au GOP.
+    """
+    if len(frame_indices) < 2:
+        return "seek"
+    stride = max(b - a for a, b in zip(frame_indices, frame_indices[1:]))
+    return "sequential" if stride <= keyframe_interval else "seek"
+
+def shrink_gray(frame, probe_size=(64, 36)):
+    """Réduit une frame à probe_size en niveaux de gris (sonde de mouvement)"""
+    small = cv2.resize(frame, probe_size, interpolation=cv2.INTER_AREA)
+    return cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+
+def motion_energy(frames, probe_size=(64, 36)):
+    """Énergie de mouvement maximale entre frames successives
+
+    Différence absolue moyenne (0-255) entre sondes réduites consécutives ;
+    0.0 avec moins de deux frames.
+    """
+    peak = 0.0
+    previous = None
+    for frame in frames:
+        small = shrink_gray(frame, probe_size)
+        if previous is not None:
+            peak = max(peak, cv2.mean(cv2.absdiff(small, previous))[0])
+        previous = small
+    return peak
+
+class VideoSession:
+    def __init__(self, video_path, max_width=None):
+        """Ouvre la vidéo et lit ses métadonnées
+
+        max_width : largeur maximale des frames produites ; les frames plus
+        larges (4K) sont réduites dès le décodage. Les métadonnées gardent la
+        résolution d'origine ; decode_scale donne le facteur appliqué.
+        """
+        self.video_path = str(video_path)
+        self.cap = cv2.VideoCapture(self.video_path)
+        if not self.cap.isOpened():
+            raise IOError(f"Impossible d'ouvrir la vidéo {self.video_path}")
+
+        self.fps = self.cap.get(cv2.CAP_PROP_FPS)
+        self.frame_count = int(self.cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        self.width = int(self.cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+        self.height = int(self.cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+        fourcc = int(self.cap.get(cv2.CAP_PROP_FOURCC))
+        self.codec = "".join(chr((fourcc >> (8 * i)) & 0xFF) for i in range(4)).strip("\x00 ")
+
+        # Taille des frames produites (réduites si max_width est dépassé)
+        self.decode_scale = 1.0
+        if max_width and self.width > max_width:
+            self.decode_scale = max_width / self.width
+        self.frame_width = int(round(self.width * self.decode_scale))
+        self.frame_height = int(round(self.height * self.decode_scale))
+
+        # Indice de la prochaine frame que le décodeur va produire
+        self.position = 0
+
+    @property
+    def duration(self):
+        """Durée de la vidéo en secondes"""
+        return self.frame_count / self.fps if self.fps > 0 else 0.0
+
+    def metadata(self):
+        """Métadonnées de la vidéo sous forme de dictionnaire"""
+        return {
+            'fps': self.fps,
+            'frame_count': self.frame_count,
+            'duration': self.duration,
+            'width': self.width,
+            'height': self.height,
+            'codec': self.codec
+        }
+
+    def _decoded(self, frame):
+        """Réduit une frame décodée à la taille de sortie de la session
+
+        Interpolation bilinéaire, comme le redimensionnement des détecteurs :
+        INTER_AREA coûte ~5x plus cher sur une frame 4K.
+        """
+        if self.decode_scale == 1.0:
+            return frame
+        return cv2.resize(frame, (self.frame_width, self.frame_height), interpolation=cv2.INTER_LINEAR)
+
+    def read_frame(self, frame_idx):
+        """Lit une frame précise en positionnant le décodeur"""
+        self.cap.set(cv2.CAP_PROP_POS_FRAMES, frame_idx)
+        ret, frame = self.cap.read()
+        self.position = frame_idx + 1
+        return self._decoded(frame) if ret else None
+
+    def read_frames_seek(self, frame_indices):
+        """Lit les frames ciblées en repositionnant le décodeur pour chacune"""
+        frames = []
+        for frame_idx in frame_indices:
+            frame = self.read_frame(frame_idx)
+            if frame is not None:
+                frames.append(frame)
+        return frames
+
+    def read_frames_sequential(self, frame_indices):
+        """Lit les frames ciblées en une seule passe avant
+
+        grab() avance le décodeur sans convertir l'image ; retrieve() n'est
+        appelé que sur les indices demandés.
+        """
+        frames = []
+        if not frame_indices:
+            return frames
+
+        # Revenir au début si une frame demandée est déjà passée
+        if min(frame_indices) < self.position:
+            self.cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+            self.position = 0
+
+        targets = set(frame_indices)
+        last_idx = max(frame_indices)
+        while self.position <= last_idx:
+            if not self.cap.grab():
+                break
+            if self.position in targets:
+                ret, frame = self.cap.retrieve()
+                if ret:
+                    frames.append(self._decoded(frame))
+            self.position += 1
+        return frames
+
+    def sample_frames(self, max_frames=10, strategy="auto", keyframe_interval=None):
+        """Extrait max_frames frames espacées dans la vidéo
+
+        strategy : "sequential" (grab/retrieve en une passe), "seek"
+        (positionnement par frame) ou "auto" (choix selon l'écart entre
+        frames et l'espacement des images clés).
+        """
+        frame_indices = compute_frame_indices(self.frame_count, max_frames)
+
+        if strategy == "auto":
+            if keyframe_interval is None:
+                keyframe_interval = int((self.fps or 25) * DEFAULT_KEYFRAME_SECONDS)
+            strategy = choose_sampling_strategy(frame_indices, keyframe_interval)
+
+        if strategy == "sequential":
+            return self.read_frames_sequential(frame_indices)
+        return self.read_frames_seek(frame_indices)
+
+    def sample_frames_motion(self, frames_per_second=0.5, max_frames=120, motion_threshold=2.0,
+                             probes_per_second=1, probe_size=(64, 36), fallback_frames=10, backend="auto"):
+        """Sélectionne les frames les plus animées de la vidéo
+
+        Les sondes sont des images clés (iter_keyframes : PyAV ne décode que
+        les images retenues, OpenCV se positionne sur leur espacement
+        supposé), au plus probes_per_second par seconde : aucune passe ne
+        décode toutes les frames. Chaque sonde, réduite à probe_size en
+        niveaux de gris, reçoit une énergie de mouvement (différence
+        absolue moyenne avec la sonde précédente). Le budget de frames
+        (frames_per_second × durée, plafonné à max_frames) va aux sondes
+        les plus animées dont l'énergie dépasse motion_threshold fois
+        l'énergie médiane du clip : le seuil suit le bruit de la caméra et
+        un petit animal reste au-dessus. Si aucune sonde ne le dépasse,
+        fallback_frames frames uniformes sont retournées.
+
+        Retourne une liste de (indice, frame) triée par indice ; l'énergie
+        maximale mesurée est conservée dans self.motion_peak.
+        """
+        budget = max(1, min(max_frames, int(math.ceil(self.duration * frames_per_second))))
+        probe_count = max(2, int(math.ceil(self.duration * probes_per_second)))
+        fps = self.fps or 25
+
+        # Tas des frames retenues : (énergie, indice, frame), plus faible en tête.
+        # Les frames y entrent déjà réduites (decode_width) : la 4K pleine
+        # résolution n'est jamais conservée au-delà de la frame courante
+        selected = []
+        energies = []
+        previous = None
+        for frame_time, frame in self.iter_keyframes(backend, probe_count):
+            frame_idx = int(round(frame_time * fps))
+            small = shrink_gray(frame, probe_size)
+            if previous is not None:
+                energy = cv2.mean(cv2.absdiff(small, previous))[0]
+                energies.append(energy)
+                if len(selected) < budget:
+                    heapq.heappush(selected, (energy, frame_idx, frame))
+                elif energy > selected[0][0]:
+                    heapq.heapreplace(selected, (energy, frame_idx, frame))
+            previous = small
+
+        self.motion_peak = max(energies, default=0.0)
+        gate = motion_threshold * statistics.median(energies) if energies else math.inf
+        moving = sorted((frame_idx, frame) for energy, frame_idx, frame in selected if energy > gate)
+        if moving:
+            return moving
+
+        logger.debug(f"Aucune sonde au-dessus de {gate:.3f}, {fallback_frames} frames uniformes")
+        frame_indices = compute_frame_indices(self.frame_count, fallback_frames)
+        return list(zip(frame_indices, self.sample_frames(fallback_frames)))
+
+    def iter_keyframes(self, backend="auto", max_frames=None):
+        """Produit (horodatage en secondes, frame) pour des images clés du clip
+
+        max_frames : nombre maximal d'images clés, réparties uniformément
+        sur le clip (toutes si None). Avec PyAV, les positions des images
+        clés sont lues dans le conteneur (démultiplexage sans décodage),
+        seules les images retenues sont décodées et l'horodatage est le PTS
+        exact du flux. Sans PyAV, OpenCV se positionne sur l'espacement
+        supposé des images clés (voir _iter_keyframes_seek).
+        """
+        if backend in ("auto", "pyav"):
+            try:
+                import av
+            except ImportError:
+                if backend == "pyav":
+                    raise
+                logger.debug("PyAV non disponible, images clés approchées par positionnement OpenCV")
+            else:
+                yield from self._iter_keyframes_pyav(av, max_frames)
+                return
+
+        yield from self._iter_keyframes_seek(max_frames)
+
+    def _iter_keyframes_pyav(self, av, max_frames=None):
+        """Images clés décodées par PyAV avec leur PTS exact
+
+        Une première passe de démultiplexage relève les paquets d'images
+        clés (espacement réel du GOP, sans décodage) ; la seconde ne donne
+        au décodeur que les paquets retenus, décodables seuls. La réduction
+        éventuelle est faite par swscale pendant la conversion en BGR, sans
+        passer par une image pleine résolution.
+        """
+        with av.open(self.video_path) as container:
+            stream = container.streams.video[0]
+            keyframe_pts = [packet.pts for packet in container.demux(stream)
+                            if packet.is_keyframe and packet.pts is not None]
+            if max_frames is not None:
+                keyframe_pts = [keyframe_pts[i] for i in compute_frame_indices(len(keyframe_pts), max_frames)]
+            targets = set(keyframe_pts)
+            if not targets:
+                return
+
+            container.seek(0, stream=stream)
+            codec = stream.codec_context
+            codec.skip_frame = "NONKEY"
+            start_time = stream.start_time or 0
+            size = {}
+            if self.decode_scale != 1.0:
+                size = {'width': self.frame_width, 'height': self.frame_height}
+            last_pts = max(targets)
+
+            def timed(frames):
+                for frame in frames:
+                    if frame.pts in targets:
+                        yield (float((frame.pts - start_time) * stream.time_base),
+                               frame.to_ndarray(format='bgr24', **size))
+
+            for packet in container.demux(stream):
+                if packet.pts in targets and packet.is_keyframe:
+                    yield from timed(codec.decode(packet))
+                if packet.pts is not None and packet.pts >= last_pts:
+                    break
+            # Frames encore retenues par le décodeur (délai de réordonnancement)
+            yield from timed(codec.decode(None))
+
+    def _iter_keyframes_seek(self, max_frames=None):
+        """Approximation OpenCV par positionnement, sans lecture du GOP réel
+
+        OpenCV n'expose pas la position des images clés : on se positionne
+        toutes les DEFAULT_KEYFRAME_SECONDS (au plus max_frames positions
+        réparties sur le clip) et l'horodatage est lu via CAP_PROP_POS_MSEC.
+        """
+        keyframe_interval = max(1, int((self.fps or 25) * DEFAULT_KEYFRAME_SECONDS))
+        positions = list(range(0, max(self.frame_count, 1), keyframe_interval))
+        if max_frames is not None:
+            positions = [positions[i] for i in compute_frame_indices(len(positions), max_frames)]
+        for frame_idx in positions:
+            frame = self.read_frame(frame_idx)
+            if frame is None:
+                break
+            yield self.cap.get(cv2.CAP_PROP_POS_MSEC) / 1000.0, frame
+
+    def close(self):
+        """Libère le décodeur"""
+        self.cap.release()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
@@ -9,6 +9,7 @@ import mimetypes
 from flask import Flask, request, Response, send_file, abort
 import cv2
 import logging
+from video_session import VideoSession
 
 logger = logging.getLogger(__name__)
 
@@ -121,16 +122,11 @@ class VideoStreamer:
     def generate_thumbnail(self, video_path):
         """Génère une miniature de la vidéo"""
         try:
-            cap = cv2.VideoCapture(video_path)
-            
             # Aller au milieu de la vidéo
-            frame_count = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
-            cap.set(cv2.CAP_PROP_POS_FRAMES, frame_count // 2)
-            
-            ret, frame = cap.read()
-            cap.release()
+            with VideoSession(video_path) as session:
+                frame = session.read_frame(session.frame_count // 2)
             
-            if ret:
+            if frame is not None:
                 # Redimensionner la miniature
                 height, width = frame.shape[:2]
                 max_size = 300
@@ -0,0 +1,220 @@
+#!/usr/bin/env python3
+"""
+Surveillance d'un dossier de dépôt des pièges photo
+Analyse au fil de l'eau les vidéos qui arrivent (une fois entièrement
+écrites) et met à jour les résultats et le résumé de l'interface web sans
+réanalyser le dossier
+"""
+
+import os
+import json
+import time
+import logging
+from pathlib import Path
+from video_analyzer import VideoAnalyzer
+from video_discovery import VIDEO_EXTENSIONS
+from analysis_cache import AnalysisCache
+from detectors import DETECTOR_REGISTRY
+from results_io import JsonlResultWriter, load_results
+from report_generator import ReportGenerator
+
+logger = logging.getLogger(__name__)
+
+def is_video_file(path):
+    """Vrai si le nom de fichier porte une extension vidéo analysée"""
+    return os.path.splitext(path)[1].lower() in VIDEO_EXTENSIONS
+
+class FolderWatcher:
+    def __init__(self, watch_dir, settle_seconds=10.0, poll_interval=10.0, use_inotify=True, seen=None):
+        """Surveille watch_dir (sous-dossiers compris) et signale les vidéos prêtes
+
+        Une vidéo est prête quand sa taille et sa date n'ont pas changé depuis
+        settle_seconds : une copie ou un transfert en cours n'est pas analysé.
+        Les événements inotify (inotify_simple, optionnel, Linux) réveillent la
+        boucle dès l'arrivée d'un fichier ; sans eux, le dossier est parcouru
+        toutes les poll_interval secondes. seen : chemins absolus déjà traités.
+        """
+        self.watch_dir = os.path.abspath(watch_dir)
+        self.settle_seconds = settle_seconds
+        self.poll_interval = poll_interval
+        self.seen = set(seen or ())
+        self.pending = {}
+        self.inotify = self._open_inotify() if use_inotify else None
+        self.watches = {}
+        if self.inotify is not None:
+            self._watch_tree(self.watch_dir)
+
+    def _open_inotify(self):
+        """Instance inotify, ou None (module absent ou plateforme non Linux)"""
+        try:
+            from inotify_simple import INotify
+        except ImportError:
+            logger.info("inotify_simple non installé, surveillance par parcours périodique")
+            return None
+        try:
+            return INotify()
+        except OSError as e:
+            logger.warning(f"inotify indisponible ({e}), surveillance par parcours périodique")
+            return None
+
+    def _watch_tree(self, root):
+        """Ajoute une surveillance sur root et ses sous-dossiers"""
+        from inotify_simple import flags
+
+        mask = flags.CLOSE_WRITE | flags.MOVED_TO | flags.CREATE
+        for dirpath, _, _ in os.walk(root):
+            try:
+                self.watches[self.inotify.add_watch(dirpath, mask)] = dirpath
+            except OSError as e:
+                logger.warning(f"Surveillance impossible de {dirpath}: {e}")
+
+    def scan(self, root=None):
+        """Ajoute aux fichiers en attente les vidéos non traitées sous root"""
+        for dirpath, _, filenames in os.walk(root or self.watch_dir):
+            for filename in filenames:
+                self.track(os.path.join(dirpath, filename))
+
+    def track(self, path):
+        """Met une vidéo en attente de stabilisation"""
+        if path in self.seen or path in self.pending or not is_video_file(path):
+            return
+        self.pending[path] = (None, None, time.monotonic())
+
+    def _read_events(self, timeout):
+        """Attend les événements inotify (timeout en secondes)"""
+        from inotify_simple import flags
+
+        for event in self.inotify.read(timeout=int(timeout * 1000)):
+            if event.mask & flags.Q_OVERFLOW:
+                logger.warning("File d'événements inotify saturée, nouveau parcours du dossier")
+                self.scan()
+                continue
+            dirpath = self.watches.get(event.wd)
+            if dirpath is None or not event.name:
+                continue
+            path = os.path.join(dirpath, event.name)
+            if event.mask & flags.ISDIR:
+                # Nouveau sous-dossier : le surveiller et reprendre ce qu'il contient déjà
+                self._watch_tree(path)
+                self.scan(path)
+            else:
+                self.track(path)
+
+    def ready_files(self):
+        """Retire et retourne les vidéos en attente stables depuis settle_seconds"""
+        now = time.monotonic()
+        ready = []
+        for path, (size, mtime_ns, since) in list(self.pending.items()):
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                # Fichier supprimé ou renommé avant d'être prêt
+                del self.pending[path]
+                continue
+            if (stat.st_size, stat.st_mtime_ns) != (size, mtime_ns):
+                self.pending[path] = (stat.st_size, stat.st_mtime_ns, now)
+            elif stat.st_size > 0 and now - since >= self.settle_seconds:
+                del self.pending[path]
+                self.seen.add(path)
+                ready.append(path)
+        return sorted(ready)
+
+    def iter_ready(self):
+        """Produit sans fin des lots de vidéos prêtes (listes triées de chemins)"""
+        self.scan()
+        while True:
+            # Revérifier plus souvent tant que des fichiers se stabilisent
+            timeout = min(self.poll_interval, self.settle_seconds) if self.pending else self.poll_interval
+            if self.inotify is not None:
+                self._read_events(timeout)
+            else:
+                time.sleep(timeout)
+                self.scan()
+            ready = self.ready_files()
+            if ready:
+                yield ready
+
+    def close(self):
+        """Libère le descripteur inotify"""
+        if self.inotify is not None:
+            self.inotify.close()
+            self.inotify = None
+
+def write_summary(results, summary_file):
+    """Réécrit le résumé de l'interface web de façon atomique"""
+    summary = ReportGenerator(results=results).build_json_summary()
+    tmp_file = f"{summary_file}.tmp"
+    with open(tmp_file, 'w', encoding='utf-8') as f:
+        json.dump(summary, f, indent=2, ensure_ascii=False)
+    os.replace(tmp_file, summary_file)
+
+def watch(analyzer, watcher, results_file="analysis_results.jsonl", summary_file="summary.json", results=None):
+    """Analyse les vidéos signalées par watcher au fur et à mesure
+
+    Chaque résultat est ajouté au fichier JSON Lines dès la fin de sa vidéo ;
+    summary.json est réécrit après chaque lot (l'interface web le recharge).
+    results : résultats déjà présents dans results_file, repris dans le résumé.
+    """
+    results = list(results or [])
+    with JsonlResultWriter(results_file, append=True) as writer:
+        for paths in watcher.iter_ready():
+            logger.info(f"{len(paths)} nouvelles vidéos prêtes")
+            count = 0
+            for result in analyzer.iter_directory_results([Path(p) for p in paths]):
+                writer.write(result)
+                results.append(result)
+                count += 1
+            if count:
+                write_summary(results, summary_file)
+                logger.info(f"Résumé mis à jour: {len(results)} vidéos dans {summary_file}")
+
+def main():
+    """Fonction principale"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Analyse en continu des vidéos déposées dans un dossier")
+    parser.add_argument("watch_dir", help="Dossier de dépôt à surveiller (sous-dossiers compris)")
+    parser.add_argument("--results", default="analysis_results.jsonl",
+                        help="Fichier de résultats JSON Lines, complété au fil des analyses")
+    parser.add_argument("--summary", default="summary.json", help="Résumé de l'interface web, réécrit après chaque lot")
+    parser.add_argument("--settle", type=float, default=10.0,
+                        help="Secondes sans changement de taille avant d'analyser un fichier")
+    parser.add_argument("--poll", type=float, default=10.0, help="Intervalle de parcours du dossier (secondes)")
+    parser.add_argument("--polling", action="store_true", help="Ne pas utiliser inotify, parcourir le dossier")
+    parser.add_argument("--detector", choices=list(DETECTOR_REGISTRY), default="fast", help="Type de détecteur")
+    parser.add_argument("--sampling", choices=["auto", "sequential", "seek", "adaptive", "keyframes"],
+                        default="auto", help="Mode de lecture des frames")
+    parser.add_argument("--detections", choices=["raw", "events", "both"], default="raw",
+                        help="Détections par frame (raw), regroupées en événements (events) ou les deux")
+    parser.add_argument("--roi-config", help="Masques de zones par caméra (JSON)")
+    parser.add_argument("--prefilter-threshold", type=float,
+                        help="Énergie de mouvement sous laquelle un clip est déclaré vide")
+    parser.add_argument("--workers", "-w", type=int, default=1, help="Processus d'analyse en parallèle par lot")
+    parser.add_argument("--pipeline", action="store_true", help="Recouvrir décodage et détection (threads)")
+    parser.add_argument("--cache", help="Fichier de cache des analyses")
+
+    args = parser.parse_args()
+    if not args.results.endswith(".jsonl"):
+        parser.error("--results doit être un fichier JSON Lines (.jsonl), complété en ajout")
+
+    analyzer = VideoAnalyzer(detector_type=args.detector, sampling=args.sampling, workers=args.workers,
+                             cache=AnalysisCache(args.cache) if args.cache else None,
+                             detection_format=args.detections, roi_config=args.roi_config,
+                             prefilter_threshold=args.prefilter_threshold, pipeline=args.pipeline)
+
+    # Les vidéos déjà présentes dans les résultats ne sont pas réanalysées
+    results = load_results(args.results) if os.path.exists(args.results) else []
+    processed = {os.path.abspath(r['video_path']) for r in results}
+    watcher = FolderWatcher(args.watch_dir, settle_seconds=args.settle, poll_interval=args.poll,
+                            use_inotify=not args.polling, seen=processed)
+    mode = "inotify" if watcher.inotify is not None else f"parcours toutes les {args.poll:g} s"
+    print(f"Surveillance de {watcher.watch_dir} ({mode}), {len(processed)} vidéos déjà analysées")
+    try:
+        watch(analyzer, watcher, args.results, args.summary, results)
+    except KeyboardInterrupt:
+        print("\nSurveillance arrêtée")
+    finally:
+        watcher.close()
+
+if __name__ == "__main__":
+    main()
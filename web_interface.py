@@ -9,6 +9,7 @@ import os
 from pathlib import Path
 import logging
 from video_streamer import VideoStreamer
+from results_io import load_results
 
 # Configuration du logging
 logging.basicConfig(level=logging.INFO)
@@ -17,37 +18,50 @@ logger = logging.getLogger(__name__)
 app = Flask(__name__)
 
 class WebInterface:
-    def __init__(self, results_file="analysis_results.json", summary_file="summary.json", video_dir=None):
+    def __init__(self, results_file="analysis_results.json", summary_file="summary.json", video_dir=None, data=None):
+        """data : résumé déjà en mémoire (pipeline de run_analysis.py), sinon lu sur disque"""
         self.results_file = results_file
         self.summary_file = summary_file
         self.video_dir = video_dir
-        self.data = self.load_data()
+        self.data_mtime = None
+        self.data = data if data is not None else self.load_data()
     
     def load_data(self):
         """Charge les données d'analyse"""
         try:
             if os.path.exists(self.summary_file):
+                self.data_mtime = os.stat(self.summary_file).st_mtime_ns
                 with open(self.summary_file, 'r', encoding='utf-8') as f:
                     return json.load(f)
             elif os.path.exists(self.results_file):
-                with open(self.results_file, 'r', encoding='utf-8') as f:
-                    results = json.load(f)
-                    # Créer un résumé basique
-                    return {
-                        "statistics": {
-                            "total_videos": len(results),
-                            "videos_with_detections": sum(1 for r in results if r['detection_count'] > 0),
-                            "total_detections": sum(r['detection_count'] for r in results),
-                            "detection_rate": 0
-                        },
-                        "animal_counts": {},
-                        "top_videos": [],
-                        "all_results": results
-                    }
+                results = load_results(self.results_file)
+                # Créer un résumé basique
+                return {
+                    "statistics": {
+                        "total_videos": len(results),
+                        "videos_with_detections": sum(1 for r in results if r['detection_count'] > 0),
+                        "total_detections": sum(r['detection_count'] for r in results),
+                        "detection_rate": 0
+                    },
+                    "animal_counts": {},
+                    "top_videos": [],
+                    "all_results": results
+                }
         except Exception as e:
             logger.error(f"Erreur lors du chargement des données: {e}")
             return None
     
+    def refresh(self):
+        """Recharge summary.json s'il a changé depuis le chargement (mode veille)"""
+        if self.data_mtime is None:
+            return
+        try:
+            mtime = os.stat(self.summary_file).st_mtime_ns
+        except OSError:
+            return
+        if mtime != self.data_mtime:
+            self.data = self.load_data()
+    
     def get_video_info(self, filename):
         """Récupère les informations d'une vidéo spécifique"""
         if not self.data or 'all_results' not in self.data:
@@ -66,6 +80,7 @@ web_interface = WebInterface()
 @app.route('/')
 def index():
     """Page principale"""
+    web_interface.refresh()
     if not web_interface.data:
         return render_template('error.html', message="Aucune donnée d'analyse trouvée")
     
@@ -74,6 +89,7 @@ def index():
 @app.route('/api/summary')
 def api_summary():
     """API pour récupérer le résumé"""
+    web_interface.refresh()
     if not web_interface.data:
         return jsonify({"error": "Aucune donnée disponible"}), 404
     
@@ -97,6 +113,7 @@ def api_search():
     query = request.args.get('q', '').lower()
     animal_filter = request.args.get('animal', '')
     
+    web_interface.refresh()
     if not web_interface.data or 'all_results' not in web_interface.data:
         return jsonify({"error": "Aucune donnée disponible"}), 404
     
@@ -660,26 +677,33 @@ def main():
     parser.add_argument("--host", default="127.0.0.1", help="Adresse du serveur")
     parser.add_argument("--debug", action="store_true", help="Mode debug")
     parser.add_argument("--video-dir", "-v", help="Dossier contenant les vidéos")
+    parser.add_argument("--results", "-r", default="analysis_results.json",
+                        help="Fichier de résultats (.json ou .jsonl) si summary.json est absent")
     
     args = parser.parse_args()
     
+    serve(WebInterface(results_file=args.results, video_dir=args.video_dir),
+          host=args.host, port=args.port, debug=args.debug)
+
+def serve(interface, host="127.0.0.1", port=5000, debug=False):
+    """Lance le serveur web sur les données d'une WebInterface (bloquant)"""
     # Créer les templates
     create_templates()
     
     # Mettre à jour l'instance globale avec le dossier vidéo
     global web_interface
-    web_interface = WebInterface(video_dir=args.video_dir)
+    web_interface = interface
     
     # Initialiser le streamer vidéo avec le bon dossier
-    video_streamer = VideoStreamer(app, video_dir=args.video_dir)
+    video_streamer = VideoStreamer(app, video_dir=interface.video_dir)
     
-    print(f"🌐 Interface web démarrée sur http://{args.host}:{args.port}")
-    if args.video_dir:
-        print(f"📁 Dossier vidéo: {args.video_dir}")
+    print(f"🌐 Interface web démarrée sur http://{host}:{port}")
+    if interface.video_dir:
+        print(f"📁 Dossier vidéo: {interface.video_dir}")
     else:
         print("📁 Recherche des vidéos dans: videos/, data/, ou racine du projet")
     
-    app.run(host=args.host, port=args.port, debug=args.debug)
+    app.run(host=host, port=port, debug=debug)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
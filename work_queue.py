@@ -0,0 +1,247 @@
+#!/usr/bin/env python3
+"""
+File de travail partagée pour l'analyse sur plusieurs machines
+Une base SQLite sur un stockage commun tient la liste des vidéos et les baux
+des processus qui les analysent ; un bail non renouvelé (processus arrêté,
+machine perdue) expire et la vidéo est redistribuée. Aucun service à déployer
+"""
+
+import os
+import json
+import time
+import socket
+import sqlite3
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+def default_worker_id():
+    """Identifiant d'un processus de travail : machine-pid"""
+    return f"{socket.gethostname()}-{os.getpid()}"
+
+class WorkQueue:
+    def __init__(self, db_file="work_queue.db", lease_seconds=300.0, max_attempts=3):
+        """File de travail dans la base SQLite db_file (créée au besoin)
+
+        Une vidéo est en attente (pending), prise par un processus (leased,
+        jusqu'à lease_until), terminée (done, résultat JSON conservé) ou en
+        échec (failed) après max_attempts tentatives. Le verrouillage de
+        SQLite suppose un système de fichiers qui le respecte (disque local,
+        SMB, NFS avec verrous) ; les chemins des vidéos doivent être les
+        mêmes sur toutes les machines.
+        """
+        self.db_file = db_file
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.local = threading.local()
+        with self.transaction() as db:
+            db.execute("""CREATE TABLE IF NOT EXISTS jobs (
+                              video_path TEXT PRIMARY KEY,
+                              state TEXT NOT NULL DEFAULT 'pending',
+                              worker TEXT,
+                              lease_until REAL,
+                              attempts INTEGER NOT NULL DEFAULT 0,
+                              result TEXT,
+                              error TEXT)""")
+            db.execute("CREATE INDEX IF NOT EXISTS jobs_state ON jobs (state, lease_until)")
+
+    def connection(self):
+        """Connexion propre au thread courant (le battement de cœur a la sienne)"""
+        db = getattr(self.local, 'db', None)
+        if db is None:
+            db = sqlite3.connect(self.db_file, timeout=60, isolation_level=None)
+            self.local.db = db
+        return db
+
+    def transaction(self):
+        """Transaction en écriture (BEGIN IMMEDIATE : un seul écrivain à la fois)"""
+        return _Transaction(self.connection())
+
+    def enqueue(self, video_paths):
+        """Ajoute les vidéos absentes de la file ; retourne le nombre ajouté
+
+        Idempotent : chaque machine peut lancer la même commande sur le même
+        dossier, les vidéos déjà connues gardent leur état.
+        """
+        with self.transaction() as db:
+            before = db.total_changes
+            db.executemany("INSERT OR IGNORE INTO jobs (video_path) VALUES (?)",
+                           [(os.path.abspath(p),) for p in video_paths])
+            return db.total_changes - before
+
+    def claim(self, worker_id):
+        """Prend un bail sur la prochaine vidéo disponible ; None si aucune
+
+        Les baux expirés sont redistribués ; une vidéo dont les baux ont
+        expiré max_attempts fois passe en échec.
+        """
+        now = time.time()
+        with self.transaction() as db:
+            db.execute("""UPDATE jobs SET state = 'failed', worker = NULL, error = 'bail expiré'
+                          WHERE state = 'leased' AND lease_until < ? AND attempts >= ?""",
+                       (now, self.max_attempts))
+            row = db.execute("""SELECT video_path FROM jobs
+                                WHERE state = 'pending' OR (state = 'leased' AND lease_until < ?)
+                                ORDER BY video_path LIMIT 1""", (now,)).fetchone()
+            if row is None:
+                return None
+            db.execute("""UPDATE jobs SET state = 'leased', worker = ?, lease_until = ?, attempts = attempts + 1
+                          WHERE video_path = ?""", (worker_id, now + self.lease_seconds, row[0]))
+            return row[0]
+
+    def renew(self, worker_id, video_path):
+        """Prolonge le bail ; False si la vidéo a été redistribuée entre-temps"""
+        with self.transaction() as db:
+            cursor = db.execute("""UPDATE jobs SET lease_until = ?
+                                   WHERE video_path = ? AND worker = ? AND state = 'leased'""",
+                                (time.time() + self.lease_seconds, video_path, worker_id))
+            return cursor.rowcount == 1
+
+    def complete(self, worker_id, video_path, result):
+        """Enregistre le résultat d'une vidéo
+
+        Accepté tant que la vidéo n'est pas déjà terminée, même si le bail a
+        expiré : le travail fait n'est pas perdu, le doublon éventuel est ignoré.
+        """
+        with self.transaction() as db:
+            cursor = db.execute("""UPDATE jobs SET state = 'done', worker = ?, lease_until = NULL,
+                                   result = ?, error = NULL
+                                   WHERE video_path = ? AND state != 'done'""",
+                                (worker_id, json.dumps(result, ensure_ascii=False), video_path))
+            return cursor.rowcount == 1
+
+    def fail(self, worker_id, video_path, error):
+        """Rend la vidéo à la file, ou la passe en échec après max_attempts tentatives"""
+        with self.transaction() as db:
+            db.execute("""UPDATE jobs SET state = CASE WHEN attempts >= ? THEN 'failed' ELSE 'pending' END,
+                          worker = NULL, lease_until = NULL, error = ?
+                          WHERE video_path = ? AND worker = ? AND state = 'leased'""",
+                       (self.max_attempts, error, video_path, worker_id))
+
+    def retry_failed(self):
+        """Remet en attente les vidéos en échec ; retourne leur nombre"""
+        with self.transaction() as db:
+            return db.execute("""UPDATE jobs SET state = 'pending', attempts = 0, error = NULL
+                                 WHERE state = 'failed'""").rowcount
+
+    def active_leases(self):
+        """Nombre de baux en cours (non expirés)"""
+        return self.connection().execute(
+            "SELECT COUNT(*) FROM jobs WHERE state = 'leased' AND lease_until >= ?", (time.time(),)).fetchone()[0]
+
+    def counts(self):
+        """Nombre de vidéos par état"""
+        rows = self.connection().execute("SELECT state, COUNT(*) FROM jobs GROUP BY state").fetchall()
+        return {state: count for state, count in rows}
+
+    def failures(self):
+        """(vidéo, erreur) des vidéos en échec"""
+        return self.connection().execute(
+            "SELECT video_path, error FROM jobs WHERE state = 'failed' ORDER BY video_path").fetchall()
+
+    def iter_results(self):
+        """Résultats des vidéos terminées, dans l'ordre des chemins"""
+        cursor = self.connection().execute(
+            "SELECT result FROM jobs WHERE state = 'done' ORDER BY video_path")
+        for (result,) in cursor:
+            yield json.loads(result)
+
+    def close(self):
+        """Ferme la connexion du thread courant"""
+        db = getattr(self.local, 'db', None)
+        if db is not None:
+            db.close()
+            self.local.db = None
+
+class _Transaction:
+    """Contexte BEGIN IMMEDIATE ... COMMIT/ROLLBACK sur une connexion"""
+
+    def __init__(self, db):
+        self.db = db
+
+    def __enter__(self):
+        self.db.execute("BEGIN IMMEDIATE")
+        return self.db
+
+    def __exit__(self, exc_type, exc, tb):
+        self.db.execute("COMMIT" if exc_type is None else "ROLLBACK")
+
+class LeaseHeartbeat:
+    def __init__(self, work_queue, worker_id, video_path):
+        """Renouvelle le bail d'une vidéo toutes les lease_seconds / 3 pendant son analyse"""
+        self.work_queue = work_queue
+        self.worker_id = worker_id
+        self.video_path = video_path
+        self.stop = threading.Event()
+        self.thread = threading.Thread(target=self.run, name="lease-heartbeat", daemon=True)
+
+    def run(self):
+        interval = self.work_queue.lease_seconds / 3
+        try:
+            while not self.stop.wait(interval):
+                if not self.work_queue.renew(self.worker_id, self.video_path):
+                    logger.warning(f"Bail perdu pour {self.video_path} (redistribué à un autre processus)")
+                    return
+        except sqlite3.Error as e:
+            logger.warning(f"Renouvellement du bail impossible pour {self.video_path}: {e}")
+        finally:
+            self.work_queue.close()
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop.set()
+        self.thread.join()
+
+def export_results(work_queue, output_file, candidates_file=None):
+    """Fusionne les résultats de la file dans output_file (.json ou .jsonl)
+
+    Les candidats notés (analyse avec --candidates) vont dans
+    candidates_file s'il est donné et sont retirés des résultats.
+    Retourne le nombre de résultats exportés.
+    """
+    from candidate_store import CandidateStore
+    from results_io import write_results
+
+    store = CandidateStore(candidates_file) if candidates_file else None
+    results = []
+    for result in work_queue.iter_results():
+        if store is not None:
+            result = store.collect(result)
+        else:
+            result.pop('candidates', None)
+        results.append(result)
+    write_results(results, output_file)
+    if store is not None:
+        store.save()
+    return len(results)
+
+def main():
+    """État de la file, remise en attente des échecs et export des résultats fusionnés"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="File de travail partagée de l'analyse distribuée")
+    parser.add_argument("queue", help="Base SQLite de la file (video_analyzer.py --queue)")
+    parser.add_argument("--retry-failed", action="store_true", help="Remettre en attente les vidéos en échec")
+    parser.add_argument("--export", help="Écrire les résultats fusionnés (.json ou .jsonl)")
+    parser.add_argument("--candidates", help="Écrire aussi les candidats fusionnés (.npz, analyse avec --candidates)")
+
+    args = parser.parse_args()
+    work_queue = WorkQueue(args.queue)
+    if args.retry_failed:
+        print(f"{work_queue.retry_failed()} vidéos remises en attente")
+
+    counts = work_queue.counts()
+    print(", ".join(f"{state}: {counts.get(state, 0)}" for state in ("pending", "leased", "done", "failed")))
+    for video_path, error in work_queue.failures():
+        print(f"  échec {video_path}: {error}")
+
+    if args.export:
+        count = export_results(work_queue, args.export, args.candidates)
+        print(f"{count} résultats exportés dans {args.export}")
+
+if __name__ == "__main__":
+    main()